@@ -7,21 +7,20 @@ Demonstrates the web interface with sample data.
 import sys
 import os
 import time
-import threading
 from pathlib import Path
 
+import numpy as np
+
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from src.web_interface import app, socketio, init_database, DatabaseManager
+from src.web_interface import app, socketio, init_database, db_manager, STATS_ROOM, latest_stats
 from src.utils.config_loader import ConfigLoader
 
 def create_demo_data():
     """Create sample data for demonstration."""
     print("📊 Creating demo data...")
     
-    db_manager = DatabaseManager()
-    
     # Create sample alerts
     sample_alerts = [
         {
@@ -50,8 +49,7 @@ def create_demo_data():
         }
     ]
     
-    for alert in sample_alerts:
-        db_manager.add_alert(**alert)
+    db_manager.add_alerts_bulk(sample_alerts)
     
     print("✅ Demo data created successfully")
 
@@ -71,45 +69,112 @@ def create_demo_config():
         else:
             print("⚠️  Example configuration not found")
 
+# Demo data generation
+DEMO_CAMERAS = ['Front Door', 'Back Yard', 'Side Gate']
+DEMO_ALERT_TYPES = ['person_detected', 'motion_detected', 'car_detected']
+TICK_BATCH = 100  # Ticks generated per batch of random draws
+TICK_PERIOD = 5.0  # Seconds between updates
+_rng = np.random.default_rng()
+
+# Formatted timestamp, recomputed at most once per second
+_timestamp_cache = {'second': None, 'text': ''}
+
+def _changed_stats(stats):
+    """
+    Return the stats that differ from the previous tick.
+    
+    The full current values are kept in web_interface.latest_stats, which
+    clients receive as a snapshot when they join the stats room.
+    """
+    changed = {key: value for key, value in stats.items() if latest_stats.get(key) != value}
+    latest_stats.update(changed)
+    return changed
+
+def _timestamp():
+    """Current local time as 'YYYY-MM-DD HH:MM:SS'."""
+    second = int(time.time())
+    if _timestamp_cache['second'] != second:
+        _timestamp_cache['second'] = second
+        _timestamp_cache['text'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+    return _timestamp_cache['text']
+
+def _demo_ticks():
+    """Yield (stats, alert or None) per tick, drawing random values in batches."""
+    while True:
+        # .tolist() converts to plain Python values so they serialize as JSON
+        cpu = _rng.integers(20, 81, TICK_BATCH).tolist()
+        memory = _rng.integers(50, 91, TICK_BATCH).tolist()
+        disk = _rng.integers(30, 71, TICK_BATCH).tolist()
+        temperature = _rng.integers(45, 76, TICK_BATCH).tolist()
+        
+        has_alert = (_rng.random(TICK_BATCH) < 0.1).tolist()  # 10% chance
+        alert_ids = _rng.integers(1000, 10000, TICK_BATCH).tolist()
+        cameras = _rng.integers(0, len(DEMO_CAMERAS), TICK_BATCH).tolist()
+        alert_types = _rng.integers(0, len(DEMO_ALERT_TYPES), TICK_BATCH).tolist()
+        confidences = np.round(_rng.uniform(0.7, 0.99, TICK_BATCH), 2).tolist()
+        
+        for i in range(TICK_BATCH):
+            stats = {
+                'cpu': cpu[i],
+                'memory': memory[i],
+                'disk': disk[i],
+                'temperature': temperature[i]
+            }
+            
+            alert = None
+            if has_alert[i]:
+                alert = {
+                    'id': alert_ids[i],
+                    'camera_name': DEMO_CAMERAS[cameras[i]],
+                    'alert_type': DEMO_ALERT_TYPES[alert_types[i]],
+                    'confidence': confidences[i],
+                    'timestamp': _timestamp(),
+                    'acknowledged': False
+                }
+            
+            yield stats, alert
+
 def demo_real_time_updates():
     """Send demo real-time updates via WebSocket."""
-    time.sleep(5)  # Wait for web interface to start
+    # socketio.sleep yields to the server's event loop under eventlet/gevent
+    socketio.sleep(5)  # Wait for web interface to start
     
-    import random
+    ticks = _demo_ticks()
     
     print("📡 Starting demo real-time updates...")
     
+    # Schedule against absolute deadlines so send time doesn't accumulate as drift
+    next_tick = time.perf_counter()
+    
     while True:
         try:
-            # Simulate system stats
-            stats = {
-                'cpu': random.randint(20, 80),
-                'memory': random.randint(50, 90),
-                'disk': random.randint(30, 70),
-                'temperature': random.randint(45, 75)
-            }
+            stats, alert = next(ticks)
             
-            socketio.emit('system_stats', stats)
+            # Simulate system stats; stats and any alerts go out as one message
+            payload = {
+                'stats': _changed_stats(stats),
+                'alerts': []
+            }
             
             # Occasionally send a demo alert
-            if random.random() < 0.1:  # 10% chance
-                alert = {
-                    'id': random.randint(1000, 9999),
-                    'camera_name': random.choice(['Front Door', 'Back Yard', 'Side Gate']),
-                    'alert_type': random.choice(['person_detected', 'motion_detected', 'car_detected']),
-                    'confidence': round(random.uniform(0.7, 0.99), 2),
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'acknowledged': False
-                }
-                
-                socketio.emit('new_alert', alert)
+            if alert:
+                payload['alerts'].append(alert)
                 print(f"📢 Demo alert sent: {alert['alert_type']} at {alert['camera_name']}")
             
-            time.sleep(5)  # Update every 5 seconds
+            # Every page shows alert notifications; stats-only ticks go to
+            # the clients that subscribed to the stats room
+            if payload['alerts']:
+                socketio.emit('tick', payload)
+            elif payload['stats']:
+                socketio.emit('tick', payload, room=STATS_ROOM)
+            
+            next_tick += TICK_PERIOD
+            socketio.sleep(max(0.0, next_tick - time.perf_counter()))
             
         except Exception as e:
             print(f"Error in demo updates: {e}")
-            time.sleep(10)
+            socketio.sleep(10)
+            next_tick = time.perf_counter()
 
 def main():
     """Main demo function."""
@@ -128,8 +193,7 @@ def main():
         create_demo_data()
         
         # Start real-time updates in background
-        update_thread = threading.Thread(target=demo_real_time_updates, daemon=True)
-        update_thread.start()
+        socketio.start_background_task(demo_real_time_updates)
         
         print()
         print("🌟 Demo Features:")
@@ -67,6 +67,8 @@ def main():
             host=host,
             port=port,
             debug=debug,
+            use_reloader=False,  # start_system.py supervises this process
+            log_output=debug,  # Per-request logging only when debugging
             allow_unsafe_werkzeug=True
         )
         
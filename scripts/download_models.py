@@ -6,10 +6,11 @@ This script can be run separately to pre-download models.
 import os
 import sys
 import requests
-import ssl
-from pathlib import Path
-from urllib.request import urlretrieve
-from urllib.error import URLError
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Model URLs and info
 YOLO_MODELS = {
@@ -35,35 +36,157 @@ YOLO_MODELS = {
     }
 }
 
+# Download tuning
+CHUNK_SIZE = 1024 * 1024  # 1 MiB per read
+RANGE_WORKERS = 8  # Parallel HTTP Range requests per file
+MIN_RANGE_SIZE = 4 * 1024 * 1024  # Don't split files smaller than this
+PROGRESS_STEP = 1024 * 1024  # Redraw the progress line every 1 MiB
 
-def download_with_progress(url: str, filepath: str):
-    """Download file with progress bar."""
+
+class _Progress:
+    """Thread-safe progress printer shared by all download workers."""
+    
+    def __init__(self, total_size: int):
+        self.total_size = total_size
+        self.downloaded = 0
+        self.last_printed = 0
+        self.lock = threading.Lock()
+    
+    def add(self, nbytes: int):
+        if not nbytes:
+            return
+        with self.lock:
+            self.downloaded += nbytes
+            # Printing is costly next to a fast network read, so throttle it
+            if self.total_size > 0 and (self.downloaded - self.last_printed >= PROGRESS_STEP
+                                        or self.downloaded >= self.total_size):
+                self.last_printed = self.downloaded
+                percent = (self.downloaded / self.total_size) * 100
+                print(f"\r  Progress: {percent:.1f}% ({self.downloaded}/{self.total_size} bytes)", end='', flush=True)
+
+
+class _CountingReader:
+    """File-like wrapper around a response body that reports bytes read."""
+    
+    def __init__(self, raw, progress: _Progress):
+        self.raw = raw
+        self.progress = progress
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.progress.add(len(data))
+        return data
+
+
+def _copy_response(response: requests.Response, f, progress: _Progress):
+    """Copy a streamed response body into f in large blocks."""
+    response.raw.decode_content = True  # Undo any gzip/deflate transfer encoding
+    shutil.copyfileobj(_CountingReader(response.raw, progress), f, length=CHUNK_SIZE)
+
+
+def create_session() -> requests.Session:
+    """Create an HTTP session that keeps connections alive across downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=RANGE_WORKERS,
+        max_retries=Retry(total=3, backoff_factor=0.5)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _probe(url: str, http):
+    """Return (content_length, accepts_ranges) for url via a HEAD request."""
+    response = http.head(url, allow_redirects=True)
+    response.raise_for_status()
+    total_size = int(response.headers.get('content-length', 0))
+    accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    return total_size, accepts_ranges
+
+
+def _download_range(url: str, filepath: str, start: int, end: int, progress: _Progress, http):
+    """Download bytes [start, end] of url into the same offsets of filepath."""
+    response = http.get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True)
+    response.raise_for_status()
+    if response.status_code != 206:
+        raise IOError(f"Server ignored range request (status {response.status_code})")
+    
+    with open(filepath, 'r+b') as f:
+        f.seek(start)
+        _copy_response(response, f, progress)
+
+
+def _download_ranged(url: str, filepath: str, total_size: int, http):
+    """Download file as parallel byte ranges into a pre-allocated file."""
+    with open(filepath, 'wb') as f:
+        f.truncate(total_size)
+    
+    part_size = -(-total_size // RANGE_WORKERS)  # ceil division
+    ranges = [(start, min(start + part_size, total_size) - 1)
+              for start in range(0, total_size, part_size)]
+    progress = _Progress(total_size)
+    
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(_download_range, url, filepath, start, end, progress, http)
+                   for start, end in ranges]
+        for future in futures:
+            future.result()
+
+
+def _download_stream(url: str, filepath: str, http):
+    """Download file as a single stream."""
+    response = http.get(url, stream=True)
+    response.raise_for_status()
+    
+    progress = _Progress(int(response.headers.get('content-length', 0)))
+    
+    with open(filepath, 'wb') as f:
+        _copy_response(response, f, progress)
+
+
+def download_with_progress(url: str, filepath: str, session: requests.Session = None):
+    """
+    Download file with progress bar, using parallel range requests when supported.
+    
+    Pass a session from create_session() to reuse connections across files.
+    The data is written to filepath + ".part" and only moved into place once
+    complete, so an interrupted run never leaves a truncated model behind.
+    """
+    http = session or requests
+    part_path = filepath + ".part"
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+        try:
+            total_size, accepts_ranges = _probe(url, http)
+        except requests.RequestException:
+            total_size, accepts_ranges = 0, False
         
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r  Progress: {percent:.1f}% ({downloaded}/{total_size} bytes)", end='', flush=True)
+        if accepts_ranges and total_size >= MIN_RANGE_SIZE:
+            try:
+                _download_ranged(url, part_path, total_size, http)
+            except Exception as e:
+                print(f"\n  Parallel download failed ({e}), retrying as a single stream")
+                _download_stream(url, part_path, http)
+        else:
+            _download_stream(url, part_path, http)
         
+        os.replace(part_path, filepath)
         print()  # New line after progress
         return True
         
     except Exception as e:
         print(f"\n  Error downloading: {e}")
         return False
+    
+    finally:
+        # Also runs on Ctrl-C, which is not an Exception
+        if os.path.exists(part_path):
+            os.remove(part_path)
 
 
-def download_model(model_name: str, models_dir: str = "models", force: bool = False):
+def download_model(model_name: str, models_dir: str = "models", force: bool = False,
+                   session: requests.Session = None):
     """Download a specific YOLO model."""
     
     if model_name not in YOLO_MODELS:
@@ -88,16 +211,13 @@ def download_model(model_name: str, models_dir: str = "models", force: bool = Fa
     os.makedirs(models_dir, exist_ok=True)
     
     # Try download
-    success = download_with_progress(model_info['url'], filepath)
+    success = download_with_progress(model_info['url'], filepath, session)
     
     if success:
         file_size = os.path.getsize(filepath)
         print(f"✅ {model_name} downloaded successfully ({file_size} bytes)")
         return True
     else:
-        # Cleanup failed download
-        if os.path.exists(filepath):
-            os.remove(filepath)
         print(f"❌ Failed to download {model_name}")
         return False
 
@@ -116,10 +236,12 @@ def download_all_models(models_dir: str = "models", models: list = None):
     success_count = 0
     total_count = len(models)
     
-    for model_name in models:
-        if download_model(model_name, models_dir):
-            success_count += 1
-        print()  # Spacing between models
+    # One session so consecutive models reuse the same TLS connections
+    with create_session() as session:
+        for model_name in models:
+            if download_model(model_name, models_dir, session=session):
+                success_count += 1
+            print()  # Spacing between models
     
     print(f"📊 Download Summary: {success_count}/{total_count} models downloaded successfully")
     
@@ -150,11 +272,30 @@ def list_models():
     print("  python download_models.py --model yolov8n.pt --model yolov8s.pt")
 
 
+def _advise_sequential(filepath):
+    """Hint the kernel to read a model file ahead sequentially (POSIX only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
 def test_ultralytics():
     """Test if ultralytics can load the downloaded models."""
     print("🧪 Testing model loading with ultralytics...")
     
     try:
+        import gc
+        import time
+        import numpy as np
         from ultralytics import YOLO
         
         models_dir = "models"
@@ -168,10 +309,22 @@ def test_ultralytics():
             try:
                 model_path = os.path.join(models_dir, model_file)
                 print(f"  Testing {model_file}...")
+                _advise_sequential(model_path)
                 model = YOLO(model_path)
                 print(f"  ✅ {model_file} loaded successfully")
+                
+                # Run one dummy inference so backend kernels and caches are
+                # initialised before the detector's first real frame
+                start = time.time()
+                model.predict(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+                print(f"  ✅ {model_file} warm-up inference took {time.time() - start:.2f}s")
             except Exception as e:
                 print(f"  ❌ {model_file} failed to load: {e}")
+            finally:
+                # Release each model before loading the next so peak memory
+                # is bounded by the largest model rather than the sum
+                model = None
+                gc.collect()
         
         return True
         
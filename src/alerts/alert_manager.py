@@ -1,16 +1,68 @@
 """Alert manager module - Complete implementation with TTS and rule evaluation."""
 import time
+import asyncio
+import operator
 import threading
-from typing import Dict, List, Optional, Any
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 from pathlib import Path
 import cv2
+import numpy as np
+
+try:
+    from turbojpeg import TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
 
 from loguru import logger
 from utils.audio_utils import TTSEngine, SpeakerManager
 from utils.database import Database
 
+# Background webhook delivery
+WEBHOOK_WORKERS = 4
+WEBHOOK_QUEUE_SIZE = 256
+WEBHOOK_RETRIES = 3
+WEBHOOK_HEADERS = {"Content-Type": "application/json"}
+
+# Below this many tracks the compiled per-track matcher beats NumPy overhead
+SCALAR_MATCH_MAX_TRACKS = 8
+
+# Distance condition operators; each works on floats and NumPy arrays
+DISTANCE_OPERATORS: Dict[str, Callable[[Any, float], Any]] = {
+    "less_than": operator.lt,
+    "greater_than": operator.gt,
+    "equal": lambda distance, value: abs(distance - value) < 0.1,  # Allow small tolerance
+}
+
+# Snapshot overlay style
+SNAPSHOT_FONT = cv2.FONT_HERSHEY_SIMPLEX
+SNAPSHOT_FONT_SCALE = 0.7
+SNAPSHOT_THICKNESS = 2
+SNAPSHOT_BOX_COLOR = (0, 255, 0)
+SNAPSHOT_TEXT_COLOR = (255, 255, 255)
+
+# Audio alerts are played by a worker; repeats within this window are dropped
+AUDIO_DEDUP_WINDOW = 2.0  # seconds
+
+# Database alert logging is batched and flushed periodically
+ALERT_FLUSH_INTERVAL = 0.5  # seconds
+ALERT_FLUSH_BATCH = 100
+
 
 @dataclass
 class AlertCondition:
@@ -21,6 +73,10 @@ class AlertCondition:
     distance_to_reference: Optional[Dict[str, Any]]
     zone_name: Optional[str]
     confidence_threshold: float = 0.5
+    time_range_minutes: Optional[Tuple[int, int]] = None  # Parsed time_range
+    distance_reference: Optional[str] = None  # Parsed distance_to_reference
+    distance_op: Optional[Callable[[Any, float], Any]] = None
+    distance_value: float = 0.0
 
 
 @dataclass
@@ -42,7 +98,17 @@ class AlertRule:
     conditions: AlertCondition
     actions: List[AlertAction]
     cooldown: int = 60  # seconds
-    last_triggered: float = 0.0
+    last_triggered: float = float("-inf")  # time.monotonic() of last trigger
+    snapshot_template: str = ""  # "<camera>_<rule>_<time>_track<id>.jpg" format string
+    matcher: Optional[Callable[[Any], bool]] = None  # Specialized track matcher
+
+
+@dataclass(frozen=True)
+class RuleIndex:
+    """Immutable snapshot of enabled rules, swapped as a whole on changes."""
+    by_cam_class: Dict[Tuple[str, str], Tuple[AlertRule, ...]]
+    wildcard_cam: Dict[str, Tuple[AlertRule, ...]]
+    order: Dict[str, int]
 
 
 @dataclass
@@ -57,6 +123,60 @@ class AlertEvent:
     triggered_actions: List[str]
 
 
+@lru_cache(maxsize=1024)
+def _snapshot_label(class_name: str, track_id: int) -> str:
+    """Snapshot label for a track; tracks keep their label while they live."""
+    return f"{class_name} (ID: {track_id})"
+
+
+class TrackArrays:
+    """Per-frame structure-of-arrays view of tracks for vectorized rule checks."""
+    
+    def __init__(self, tracks):
+        """
+        Build arrays from tracks.
+        
+        Args:
+            tracks: List of Track objects
+        """
+        self.tracks = list(tracks)
+        self.class_names = np.array([t.class_name for t in self.tracks], dtype=object)
+        self.confidences = np.array([t.confidence for t in self.tracks], dtype=np.float64)
+        self._flat_distances: Optional[List[Dict[str, Any]]] = None
+        self._distances: Dict[str, np.ndarray] = {}
+    
+    def distances_to(self, reference: str) -> np.ndarray:
+        """Get each track's distance to a reference point (NaN if unknown)."""
+        distances = self._distances.get(reference)
+        if distances is None:
+            # Look up each track's reference distances once, shared by all rules
+            if self._flat_distances is None:
+                self._flat_distances = [self.reference_distances(t) for t in self.tracks]
+            distances = np.array(
+                [self._as_float(d.get(reference)) for d in self._flat_distances], dtype=np.float64
+            )
+            self._distances[reference] = distances
+        return distances
+    
+    @staticmethod
+    def reference_distances(track) -> Dict[str, Any]:
+        """Get a track's {reference: distance} mapping ({} if unknown)."""
+        distance_info = getattr(track, 'distance_info', None)
+        if not distance_info:
+            return {}
+        return distance_info.get("distance_to_reference", {})
+    
+    @staticmethod
+    def _as_float(distance) -> float:
+        """Get a distance as float, NaN if missing or not numeric."""
+        return distance if isinstance(distance, (int, float)) else np.nan
+    
+    @classmethod
+    def _distance_to(cls, track, reference: str) -> float:
+        """Get one track's distance to a reference point (NaN if unknown)."""
+        return cls._as_float(cls.reference_distances(track).get(reference))
+
+
 class AlertManager:
     """Main alert management system."""
     
@@ -64,7 +184,10 @@ class AlertManager:
         """Initialize alert manager."""
         self.config = config
         self.rules: Dict[str, AlertRule] = {}
-        self.recent_alerts: List[AlertEvent] = []
+        self._rule_index = RuleIndex({}, {}, {})  # Read without locking (copy-on-write)
+        self._time_cache: Dict[str, bool] = {}
+        self._time_cache_minute = -1
+        self.recent_alerts: deque = deque(maxlen=1000)  # Oldest evicted automatically
         self.tts_engine = None
         self.speaker_manager = None
         self.database = None
@@ -79,6 +202,33 @@ class AlertManager:
         self.snapshots_dir = Path(config.get("storage.snapshots_dir", "./data/snapshots"))
         self.snapshots_dir.mkdir(parents=True, exist_ok=True)
         
+        # Snapshots are drawn, encoded and written off the evaluation thread
+        self.snapshot_quality = config.get("storage.snapshot_quality", 95)
+        self._snapshot_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot")
+        self._turbo_jpeg = self._initialize_turbojpeg()
+        
+        # Webhooks are delivered by a background event loop
+        self._start_webhook_worker()
+        
+        # Audio alerts are pooled, de-duplicated and played by one worker
+        self._audio_pool = deque()
+        self._audio_last_played: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+        self._audio_wakeup = threading.Event()
+        self._audio_stop = threading.Event()
+        self._audio_thread = threading.Thread(
+            target=self._audio_worker, daemon=True, name="audio-alerts"
+        )
+        self._audio_thread.start()
+        
+        # Alerts are written to the database in batches
+        self._alert_flush_queue = deque()
+        self._alert_flush_wakeup = threading.Event()
+        self._alert_flush_stop = threading.Event()
+        self._alert_flush_thread = threading.Thread(
+            target=self._alert_flush_loop, daemon=True, name="alert-db-flush"
+        )
+        self._alert_flush_thread.start()
+        
         logger.info(f"Alert manager initialized with {len(self.rules)} rules")
     
     def _initialize_tts(self):
@@ -91,6 +241,124 @@ class AlertManager:
             logger.error(f"Failed to initialize TTS engine: {e}")
             self.tts_engine = None
     
+    def _initialize_turbojpeg(self):
+        """Initialize libjpeg-turbo encoder if available."""
+        if TurboJPEG is None:
+            return None
+        
+        try:
+            return TurboJPEG()
+        except Exception as e:
+            logger.debug(f"TurboJPEG unavailable, using OpenCV for snapshots: {e}")
+            return None
+    
+    def _start_webhook_worker(self):
+        """Start the background event loop that delivers webhooks."""
+        self._webhook_loop = asyncio.new_event_loop()
+        self._webhook_queue: Optional[asyncio.Queue] = None
+        self._webhook_senders: List[asyncio.Task] = []
+        
+        ready = threading.Event()
+        self._webhook_thread = threading.Thread(
+            target=self._run_webhook_loop, args=(ready,), daemon=True, name="webhook"
+        )
+        self._webhook_thread.start()
+        ready.wait(timeout=5)
+    
+    def _run_webhook_loop(self, ready: threading.Event):
+        """Webhook thread entry point."""
+        asyncio.set_event_loop(self._webhook_loop)
+        try:
+            self._webhook_loop.run_until_complete(self._webhook_worker(ready))
+        except Exception as e:
+            logger.error(f"Webhook worker stopped: {e}")
+        finally:
+            self._webhook_loop.close()
+    
+    async def _webhook_worker(self, ready: threading.Event):
+        """Own a pooled HTTP session and run the webhook senders."""
+        self._webhook_queue = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+        ready.set()
+        
+        if aiohttp:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        else:
+            import requests
+            session = requests.Session()
+        
+        try:
+            self._webhook_senders = [
+                asyncio.create_task(self._webhook_sender(session)) for _ in range(WEBHOOK_WORKERS)
+            ]
+            # Senders cancelled on shutdown end with the others, not abort them
+            await asyncio.gather(*self._webhook_senders, return_exceptions=True)
+        finally:
+            if aiohttp:
+                await session.close()
+            else:
+                session.close()
+    
+    async def _webhook_sender(self, session):
+        """Deliver queued webhooks with retry and backoff until stopped."""
+        while True:
+            item = await self._webhook_queue.get()
+            if item is None:
+                return
+            
+            url, payload = item
+            try:
+                # Serialize once; retries resend the same bytes
+                body = self._encode_payload(payload)
+            except Exception as e:
+                logger.error(f"Webhook payload error: {e}")
+                continue
+            
+            for attempt in range(WEBHOOK_RETRIES):
+                try:
+                    status = await self._post_webhook(session, url, body)
+                    if status == 200:
+                        logger.info(f"Webhook sent successfully: {url}")
+                        break
+                    logger.warning(f"Webhook failed with status {status}")
+                    if status < 500:
+                        break  # Client errors won't succeed on retry
+                except Exception as e:
+                    logger.error(f"Webhook error: {e}")
+                
+                # Back off before the next attempt, not after the last one
+                if attempt + 1 < WEBHOOK_RETRIES:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+    
+    @staticmethod
+    def _encode_payload(payload: Dict[str, Any]) -> bytes:
+        """Serialize a webhook payload to JSON bytes (orjson when available)."""
+        if orjson:
+            return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(payload, default=float).encode()
+    
+    async def _post_webhook(self, session, url: str, body: bytes) -> int:
+        """POST a JSON body and return the HTTP status code."""
+        if aiohttp:
+            async with session.post(url, data=body, headers=WEBHOOK_HEADERS) as response:
+                return response.status
+        
+        # requests fallback runs in the loop's default thread pool
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            None, lambda: session.post(url, data=body, headers=WEBHOOK_HEADERS, timeout=10)
+        )
+        return response.status_code
+    
+    def _enqueue_webhook(self, item):
+        """Add a webhook to the queue (runs on the webhook loop)."""
+        try:
+            self._webhook_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.warning("Webhook queue full, dropping webhook")
+    
     def _initialize_speakers(self):
         """Initialize speaker manager."""
         try:
@@ -110,11 +378,55 @@ class AlertManager:
                 if rule:
                     self.rules[rule.name] = rule
             
+            self._build_rule_index()
+            
             logger.info(f"Loaded {len(self.rules)} alert rules")
             
         except Exception as e:
             logger.error(f"Failed to load alert rules: {e}")
     
+    def _build_rule_index(self):
+        """
+        Index enabled rules by (camera_id, object_class) for evaluate().
+        
+        A new RuleIndex is built and published with a single assignment, so
+        evaluate() can read it without taking the lock.
+        """
+        by_cam_class: Dict[Tuple[str, str], List[AlertRule]] = {}
+        wildcard_cam: Dict[str, List[AlertRule]] = {}
+        
+        for rule in self.rules.values():
+            if not rule.enabled:
+                continue
+            
+            object_class = rule.conditions.object_class
+            if rule.conditions.camera_ids:
+                for camera_id in rule.conditions.camera_ids:
+                    by_cam_class.setdefault((camera_id, object_class), []).append(rule)
+            else:
+                # Rules without a camera filter apply to every camera
+                wildcard_cam.setdefault(object_class, []).append(rule)
+        
+        self._rule_index = RuleIndex(
+            by_cam_class={key: tuple(rules) for key, rules in by_cam_class.items()},
+            wildcard_cam={key: tuple(rules) for key, rules in wildcard_cam.items()},
+            order={name: i for i, name in enumerate(self.rules)}
+        )
+    
+    def _candidate_rules(self, tracks, camera_id: str) -> List[AlertRule]:
+        """Get enabled rules whose camera and object class match any track."""
+        index = self._rule_index
+        candidates: Dict[str, AlertRule] = {}
+        
+        for class_name in {track.class_name for track in tracks}:
+            for rule in index.by_cam_class.get((camera_id, class_name), ()):
+                candidates[rule.name] = rule
+            for rule in index.wildcard_cam.get(class_name, ()):
+                candidates[rule.name] = rule
+        
+        # Keep configuration order so rule priority is unchanged
+        return sorted(candidates.values(), key=lambda r: index.order[r.name])
+    
     def _parse_alert_rule(self, rule_config: Dict[str, Any]) -> Optional[AlertRule]:
         """Parse alert rule from configuration."""
         try:
@@ -128,6 +440,12 @@ class AlertManager:
                 zone_name=conditions_config.get("zone_name"),
                 confidence_threshold=conditions_config.get("confidence_threshold", 0.5)
             )
+            conditions.time_range_minutes = self._parse_time_range(conditions.time_range)
+            if conditions.distance_to_reference:
+                distance_config = conditions.distance_to_reference
+                conditions.distance_reference = distance_config.get("reference")
+                conditions.distance_op = DISTANCE_OPERATORS.get(distance_config.get("operator", "less_than"))
+                conditions.distance_value = distance_config.get("value", 0.0)
             
             # Parse actions
             actions = []
@@ -151,6 +469,8 @@ class AlertManager:
                 actions=actions,
                 cooldown=rule_config.get("cooldown", 60)
             )
+            rule.snapshot_template = "%s_" + str(rule.name).replace("%", "%%") + "_%s_track%d.jpg"
+            rule.matcher = self._compile_matcher(conditions)
             
             return rule
             
@@ -166,55 +486,126 @@ class AlertManager:
             tracks: List of Track objects
             frame: Frame object
         """
+        # Cooldowns use the monotonic clock so wall-clock jumps can't skip or
+        # extend them; wall time is read once for time ranges and events
+        monotonic_now = time.monotonic()
         current_time = time.time()
+        local = time.localtime(current_time)
+        now_min = local.tm_hour * 60 + local.tm_min
         
-        with self.lock:
-            for rule in self.rules.values():
-                if not rule.enabled:
-                    continue
-                
-                # Check cooldown
-                if current_time - rule.last_triggered < rule.cooldown:
-                    continue
-                
-                # Evaluate rule against tracks
-                if self._evaluate_rule(rule, tracks, frame):
-                    self._trigger_alert(rule, tracks, frame)
-                    rule.last_triggered = current_time
+        # No lock: rules are read from an immutable snapshot, so cameras can
+        # be evaluated in parallel
+        track_arrays = None
+        use_arrays = len(tracks) > SCALAR_MATCH_MAX_TRACKS
+        
+        for rule in self._candidate_rules(tracks, frame.camera_id):
+            # Check cooldown
+            if monotonic_now - rule.last_triggered < rule.cooldown:
+                continue
+            
+            # Build the track arrays once per frame, only if a rule needs them
+            if use_arrays and track_arrays is None:
+                track_arrays = TrackArrays(tracks)
+            
+            # Evaluate rule against tracks
+            trigger_track = self._find_trigger_track(rule, tracks, track_arrays, frame, now_min)
+            if trigger_track is not None:
+                # Claim the cooldown before acting; a concurrent evaluator
+                # can at worst raise a duplicate alert
+                rule.last_triggered = monotonic_now
+                self._trigger_alert(rule, trigger_track, frame, current_time)
     
-    def _evaluate_rule(self, rule: AlertRule, tracks, frame) -> bool:
+    def _find_trigger_track(self, rule: AlertRule, tracks, track_arrays: Optional[TrackArrays],
+                            frame, now_min: int):
         """
-        Evaluate if rule conditions are met.
+        Find the first track that meets the rule's conditions.
         
         Args:
             rule: Alert rule to evaluate
             tracks: List of Track objects
+            track_arrays: Tracks as arrays, or None to match track by track
             frame: Frame object
+            now_min: Current local time in minutes since midnight
             
         Returns:
-            True if conditions are met
+            Matching Track, or None if conditions are not met
         """
         try:
             conditions = rule.conditions
             
             # Check camera filter
             if conditions.camera_ids and frame.camera_id not in conditions.camera_ids:
-                return False
+                return None
             
             # Check time range
-            if conditions.time_range and not self._is_in_time_range(conditions.time_range):
-                return False
+            if conditions.time_range_minutes and not self._is_in_time_range(rule, now_min):
+                return None
             
             # Check for matching tracks
-            for track in tracks:
-                if self._track_matches_conditions(track, conditions, frame.camera_id):
-                    return True
+            if track_arrays is None:
+                return next((track for track in tracks if rule.matcher(track)), None)
             
-            return False
+            mask = self._match_mask(conditions, track_arrays)
+            if not mask.any():
+                return None
+            return track_arrays.tracks[int(np.argmax(mask))]
             
         except Exception as e:
             logger.error(f"Error evaluating rule {rule.name}: {e}")
-            return False
+            return None
+    
+    def _match_mask(self, conditions: AlertCondition, track_arrays: TrackArrays) -> np.ndarray:
+        """Get a boolean mask of the tracks that match rule conditions."""
+        mask = (track_arrays.class_names == conditions.object_class) & \
+            (track_arrays.confidences >= conditions.confidence_threshold)
+        
+        # Check distance to reference
+        if conditions.distance_to_reference and mask.any():
+            mask &= self._distance_mask(conditions, track_arrays)
+        
+        return mask
+    
+    def _distance_mask(self, conditions: AlertCondition, track_arrays: TrackArrays) -> np.ndarray:
+        """Vectorized distance-based condition (unknown distances never match)."""
+        if not conditions.distance_reference or conditions.distance_op is None:
+            return np.zeros(len(track_arrays.tracks), dtype=bool)
+        
+        # NaN compares False, so tracks without this distance are excluded
+        distances = track_arrays.distances_to(conditions.distance_reference)
+        return conditions.distance_op(distances, conditions.distance_value)
+    
+    def _compile_matcher(self, conditions: AlertCondition) -> Callable[[Any], bool]:
+        """
+        Build a track matcher specialized to one rule's conditions.
+        
+        Condition values are bound into a closure once at load time, so
+        matching a track is straight-line code with no config lookups.
+        Unrecognized conditions fall back to _track_matches_conditions.
+        """
+        object_class = conditions.object_class
+        threshold = conditions.confidence_threshold
+        distance_condition = conditions.distance_to_reference
+        
+        if not distance_condition:
+            def match(track) -> bool:
+                return track.class_name == object_class and track.confidence >= threshold
+            return match
+        
+        reference = conditions.distance_reference
+        compare = conditions.distance_op
+        value = conditions.distance_value
+        
+        if not reference or compare is None or not isinstance(value, (int, float)):
+            return partial(self._track_matches_conditions, conditions=conditions, camera_id=None)
+        
+        distance_to = TrackArrays._distance_to
+        
+        def match(track) -> bool:
+            if track.class_name != object_class or track.confidence < threshold:
+                return False
+            # Unknown distances are NaN, which never compares True
+            return compare(distance_to(track, reference), value)
+        return match
     
     def _track_matches_conditions(self, track, conditions: AlertCondition, camera_id: str) -> bool:
         """Check if track matches rule conditions."""
@@ -272,57 +663,72 @@ class AlertManager:
             logger.warning(f"Distance condition check error: {e}")
             return False
     
-    def _is_in_time_range(self, time_range: List[str]) -> bool:
-        """Check if current time is within specified range."""
+    def _parse_time_range(self, time_range: Optional[List[str]]) -> Optional[Tuple[int, int]]:
+        """
+        Parse a ["HH:MM", "HH:MM"] range into minutes since midnight.
+        
+        Returns:
+            (start_minutes, end_minutes), or None if the range is absent or
+            invalid (treated as always in range)
+        """
+        if not time_range:
+            return None
+        
         try:
             if len(time_range) != 2:
-                return True
+                return None
             
             start_time, end_time = time_range
-            current_time = datetime.now().time()
-            
-            # Parse time strings
             start_hour, start_min = map(int, start_time.split(':'))
             end_hour, end_min = map(int, end_time.split(':'))
             
-            start = datetime.now().replace(hour=start_hour, minute=start_min, second=0, microsecond=0).time()
-            end = datetime.now().replace(hour=end_hour, minute=end_min, second=0, microsecond=0).time()
+            return start_hour * 60 + start_min, end_hour * 60 + end_min
             
-            # Handle overnight time ranges
-            if start <= end:
-                return start <= current_time <= end
-            else:
-                return current_time >= start or current_time <= end
-                
         except Exception as e:
-            logger.warning(f"Time range check error: {e}")
-            return True
+            logger.warning(f"Invalid time range {time_range}: {e}")
+            return None
     
-    def _trigger_alert(self, rule: AlertRule, tracks, frame):
+    def _is_in_time_range(self, rule: AlertRule, now_min: int) -> bool:
+        """Check if current time (minutes since midnight) is within the rule's time range."""
+        # Results only change once a minute; replace (not clear) the cache so
+        # concurrent evaluators never see a half-reset dict
+        time_cache = self._time_cache
+        if now_min != self._time_cache_minute:
+            time_cache = self._time_cache = {}
+            self._time_cache_minute = now_min
+        
+        cached = time_cache.get(rule.name)
+        if cached is not None:
+            return cached
+        
+        start, end = rule.conditions.time_range_minutes
+        
+        # End minute is exclusive: "HH:MM" means up to HH:MM:00
+        if start <= end:
+            result = start <= now_min < end
+        else:
+            # Handle overnight time ranges
+            result = now_min >= start or now_min < end
+        
+        time_cache[rule.name] = result
+        return result
+    
+    def _trigger_alert(self, rule: AlertRule, trigger_track, frame, timestamp: Optional[float] = None):
         """
         Trigger alert actions.
         
         Args:
             rule: Alert rule that was triggered
-            tracks: List of Track objects
+            trigger_track: Track that triggered the alert
             frame: Frame object
+            timestamp: Evaluation time (default: now)
         """
         logger.warning(f"Alert triggered: {rule.name}")
         
-        # Find the track that triggered the alert
-        trigger_track = None
-        for track in tracks:
-            if self._track_matches_conditions(track, rule.conditions, frame.camera_id):
-                trigger_track = track
-                break
-        
-        if not trigger_track:
-            return
-        
         # Create alert event
         alert_event = AlertEvent(
             rule_name=rule.name,
-            timestamp=time.time(),
+            timestamp=timestamp if timestamp is not None else time.time(),
             camera_id=frame.camera_id,
             track_id=trigger_track.track_id,
             message=f"Alert: {rule.name} triggered by {trigger_track.class_name}",
@@ -337,11 +743,8 @@ class AlertManager:
                 alert_event.triggered_actions.append(action.action_type)
         
         # Store alert
-        self.recent_alerts.append(alert_event)
-        
-        # Keep only recent alerts (last 1000)
-        if len(self.recent_alerts) > 1000:
-            self.recent_alerts = self.recent_alerts[-1000:]
+        with self.lock:
+            self.recent_alerts.append(alert_event)
         
         # Log to database if available
         if self.database:
@@ -393,56 +796,112 @@ class AlertManager:
             if action.speaker and action.speaker != "all":
                 speaker_names = [action.speaker]
             
-            # Play audio
-            success = self.speaker_manager.play_audio(action.message, speaker_names)
-            
-            if success:
-                logger.info(f"Audio alert played: {action.message}")
-            else:
-                logger.warning(f"Failed to play audio alert: {action.message}")
-            
-            return success
+            # Queue for the audio worker; playback is logged there
+            self._audio_pool.append((action.message, speaker_names, time.monotonic()))
+            self._audio_wakeup.set()
+            return True
             
         except Exception as e:
             logger.error(f"Audio alert error: {e}")
             return False
     
+    def _audio_worker(self):
+        """Play pooled audio alerts, collapsing repeats of the same message."""
+        while not self._audio_stop.is_set():
+            self._audio_wakeup.wait()
+            self._audio_wakeup.clear()
+            
+            # Take everything that arrived together as one batch
+            batch = []
+            while self._audio_pool:
+                batch.append(self._audio_pool.popleft())
+            
+            for message, speaker_names, queued_at in batch:
+                if self._audio_stop.is_set():
+                    return
+                
+                key = (message, tuple(speaker_names or ()))
+                last_played = self._audio_last_played.get(key)
+                if last_played is not None and queued_at - last_played < AUDIO_DEDUP_WINDOW:
+                    logger.debug(f"Skipping repeated audio alert: {message}")
+                    continue
+                self._audio_last_played[key] = queued_at
+                
+                try:
+                    if self.speaker_manager.play_audio(message, speaker_names):
+                        logger.info(f"Audio alert played: {message}")
+                    else:
+                        logger.warning(f"Failed to play audio alert: {message}")
+                except Exception as e:
+                    logger.error(f"Audio alert error: {e}")
+            
+            # Forget entries that can no longer suppress anything
+            cutoff = time.monotonic() - AUDIO_DEDUP_WINDOW
+            for key in [k for k, t in self._audio_last_played.items() if t < cutoff]:
+                del self._audio_last_played[key]
+    
     def _execute_snapshot(self, action: AlertAction, alert_event: AlertEvent, 
                          track, frame) -> bool:
         """Execute snapshot action."""
         try:
             # Create filename
-            timestamp = datetime.fromtimestamp(alert_event.timestamp)
-            filename = (
-                f"{alert_event.camera_id}_{alert_event.rule_name}_"
-                f"{timestamp.strftime('%Y%m%d_%H%M%S')}_track{alert_event.track_id}.jpg"
+            local_time = time.localtime(alert_event.timestamp)
+            rule = self.rules.get(alert_event.rule_name)
+            if rule:
+                template = rule.snapshot_template
+            else:
+                template = "%s_" + alert_event.rule_name.replace("%", "%%") + "_%s_track%d.jpg"
+            filename = template % (
+                alert_event.camera_id, time.strftime('%Y%m%d_%H%M%S', local_time), alert_event.track_id
             )
             filepath = self.snapshots_dir / filename
             
+            # Capture track state now; the track keeps updating after we return
+            label = _snapshot_label(track.class_name, track.track_id)
+            timestamp_str = time.strftime('%Y-%m-%d %H:%M:%S', local_time)
+            
+            self._snapshot_executor.submit(
+                self._write_snapshot, frame.to_cpu(), track.bbox, label, timestamp_str, filepath
+            )
+            return True
+            
+        except Exception as e:
+            logger.error(f"Snapshot error: {e}")
+            return False
+    
+    def _write_snapshot(self, source_image, bbox: Tuple, label: str, 
+                        timestamp_str: str, filepath: Path):
+        """Draw, encode and save a snapshot (runs on the snapshot executor)."""
+        try:
             # Draw bounding box on image
-            image = frame.image.copy()
-            x1, y1, x2, y2 = track.bbox
+            image = source_image.copy()
+            x1, y1, x2, y2 = bbox
             
-            # Draw detection box
-            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            # Draw detection box (axis-aligned, so 4-connected lines look the same)
+            cv2.rectangle(image, (x1, y1), (x2, y2), SNAPSHOT_BOX_COLOR, SNAPSHOT_THICKNESS, cv2.LINE_4)
             
             # Add label
-            label = f"{track.class_name} (ID: {track.track_id})"
-            cv2.putText(image, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(image, label, (x1, y1 - 10), SNAPSHOT_FONT, SNAPSHOT_FONT_SCALE,
+                        SNAPSHOT_BOX_COLOR, SNAPSHOT_THICKNESS)
             
             # Add timestamp
-            timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            cv2.putText(image, timestamp_str, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            cv2.putText(image, timestamp_str, (10, 30), SNAPSHOT_FONT, SNAPSHOT_FONT_SCALE,
+                        SNAPSHOT_TEXT_COLOR, SNAPSHOT_THICKNESS)
             
-            # Save image
-            cv2.imwrite(str(filepath), image)
+            # Encode and save image
+            if self._turbo_jpeg:
+                data = self._turbo_jpeg.encode(image, quality=self.snapshot_quality)
+            else:
+                ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.snapshot_quality])
+                if not ok:
+                    raise RuntimeError("JPEG encoding failed")
+                data = encoded.tobytes()
+            filepath.write_bytes(data)
             
             logger.info(f"Snapshot saved: {filepath}")
-            return True
             
         except Exception as e:
             logger.error(f"Snapshot error: {e}")
-            return False
     
     def _execute_log(self, action: AlertAction, alert_event: AlertEvent, track) -> bool:
         """Execute log action."""
@@ -471,8 +930,9 @@ class AlertManager:
             if not action.webhook_url:
                 return False
             
-            import requests
-            import json
+            if self._webhook_queue is None or self._webhook_loop.is_closed():
+                logger.warning("Webhook worker not running")
+                return False
             
             # Prepare payload
             payload = {
@@ -486,20 +946,12 @@ class AlertManager:
                 "severity": alert_event.severity
             }
             
-            # Send webhook
-            response = requests.post(
-                action.webhook_url,
-                json=payload,
-                timeout=10
+            # Hand off to the webhook worker; delivery is logged there
+            self._webhook_loop.call_soon_threadsafe(
+                self._enqueue_webhook, (action.webhook_url, payload)
             )
+            return True
             
-            if response.status_code == 200:
-                logger.info(f"Webhook sent successfully: {action.webhook_url}")
-                return True
-            else:
-                logger.warning(f"Webhook failed with status {response.status_code}")
-                return False
-                
         except Exception as e:
             logger.error(f"Webhook error: {e}")
             return False
@@ -518,11 +970,42 @@ class AlertManager:
                 "delivered": 1 if alert_event.triggered_actions else 0
             }
             
-            self.database.insert_alert(alert_data)
+            self._alert_flush_queue.append(alert_data)
+            if len(self._alert_flush_queue) >= ALERT_FLUSH_BATCH:
+                self._alert_flush_wakeup.set()
             
         except Exception as e:
             logger.error(f"Database logging error: {e}")
     
+    def _alert_flush_loop(self):
+        """Periodically write queued alerts to the database."""
+        while not self._alert_flush_stop.is_set():
+            self._alert_flush_wakeup.wait(ALERT_FLUSH_INTERVAL)
+            self._alert_flush_wakeup.clear()
+            self._flush_alerts()
+        
+        # Final flush on shutdown
+        self._flush_alerts()
+    
+    def _flush_alerts(self):
+        """Write all queued alerts in a single batch."""
+        batch = []
+        while self._alert_flush_queue:
+            batch.append(self._alert_flush_queue.popleft())
+        
+        if not batch or not self.database:
+            return
+        
+        try:
+            insert_many = getattr(self.database, "insert_alerts_many", None)
+            if insert_many:
+                insert_many(batch)
+            else:
+                for alert_data in batch:
+                    self.database.insert_alert(alert_data)
+        except Exception as e:
+            logger.error(f"Database logging error ({len(batch)} alerts): {e}")
+    
     def set_database(self, database: Database):
         """Set database instance for logging."""
         self.database = database
@@ -530,7 +1013,8 @@ class AlertManager:
     def get_recent_alerts(self, limit: int = 50) -> List[AlertEvent]:
         """Get recent alert events."""
         with self.lock:
-            return self.recent_alerts[-limit:] if self.recent_alerts else []
+            start = max(0, len(self.recent_alerts) - limit)
+            return list(itertools.islice(self.recent_alerts, start, None))
     
     def get_active_rules(self) -> List[str]:
         """Get list of active rule names."""
@@ -539,7 +1023,9 @@ class AlertManager:
     def enable_rule(self, rule_name: str) -> bool:
         """Enable alert rule."""
         if rule_name in self.rules:
-            self.rules[rule_name].enabled = True
+            with self.lock:
+                self.rules[rule_name].enabled = True
+                self._build_rule_index()
             logger.info(f"Alert rule enabled: {rule_name}")
             return True
         return False
@@ -547,7 +1033,9 @@ class AlertManager:
     def disable_rule(self, rule_name: str) -> bool:
         """Disable alert rule."""
         if rule_name in self.rules:
-            self.rules[rule_name].enabled = False
+            with self.lock:
+                self.rules[rule_name].enabled = False
+                self._build_rule_index()
             logger.info(f"Alert rule disabled: {rule_name}")
             return True
         return False
@@ -579,8 +1067,46 @@ class AlertManager:
         
         with self.lock:
             self.rules.clear()
+            self._build_rule_index()
             self.recent_alerts.clear()
         
+        # Let queued snapshots finish writing
+        self._snapshot_executor.shutdown(wait=True)
+        
+        # Stop playing queued audio alerts
+        self._audio_stop.set()
+        self._audio_wakeup.set()
+        self._audio_thread.join(timeout=5)
+        
+        # Write any alerts still waiting for the database
+        self._alert_flush_stop.set()
+        self._alert_flush_wakeup.set()
+        self._alert_flush_thread.join(timeout=5)
+        
+        # Stop webhook senders after the queued webhooks are delivered; the
+        # stop sentinels wait for queue space instead of being dropped
+        if self._webhook_queue is not None and not self._webhook_loop.is_closed():
+            deadline = time.monotonic() + 10
+            try:
+                for _ in range(WEBHOOK_WORKERS):
+                    sentinel = asyncio.run_coroutine_threadsafe(
+                        self._webhook_queue.put(None), self._webhook_loop
+                    )
+                    sentinel.result(timeout=max(0.0, deadline - time.monotonic()))
+                self._webhook_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                sentinel.cancel()
+            except RuntimeError:
+                pass  # Loop closed: the worker has already exited
+            if self._webhook_thread.is_alive():
+                logger.warning("Webhooks not delivered in time, cancelling webhook senders")
+                for sender in self._webhook_senders:
+                    try:
+                        self._webhook_loop.call_soon_threadsafe(sender.cancel)
+                    except RuntimeError:
+                        break  # Loop already closed
+                self._webhook_thread.join(timeout=1)
+        
         if self.tts_engine:
             # TTS engine doesn't need explicit cleanup
             pass
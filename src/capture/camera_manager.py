@@ -1,13 +1,20 @@
 """
 Camera Manager - Handles multiple camera connections and frame capture.
 """
+import os
+import sys
 import threading
 import time
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
-from queue import Queue, Full
+from queue import SimpleQueue, Empty
 import cv2
 
+try:
+    import av
+except ImportError:
+    av = None
+
 from loguru import logger
 
 
@@ -16,31 +23,168 @@ class Frame:
     """Frame data structure."""
     camera_id: str
     timestamp: float
-    image: any  # numpy array
+    image: any  # numpy array (None until downloaded when decoded on the GPU)
     resolution: tuple
     frame_number: int
+    gpu_image: Any = None  # cv2.cuda_GpuMat when decoded with cudacodec
+    
+    def to_cpu(self):
+        """Get the image as a numpy array, downloading it from the GPU once if needed."""
+        if self.image is None and self.gpu_image is not None:
+            self.image = self.gpu_image.download()
+        return self.image
+
+
+def cudacodec_available() -> bool:
+    """Check whether OpenCV was built with NVIDIA hardware decoding and a GPU is present."""
+    try:
+        return hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
+
+class CudaCodecCapture:
+    """Stream reader that decodes on the GPU (NVDEC) and keeps frames in GPU memory."""
+    
+    def __init__(self, url: str):
+        """
+        Open a stream with cv2.cudacodec.
+        
+        Args:
+            url: Stream URL or file path
+        """
+        self.reader = None
+        self._convert_bgra = False
+        
+        try:
+            self.reader = cv2.cudacodec.createVideoReader(url)
+            try:
+                self.reader.set(cv2.cudacodec.ColorFormat_BGR)
+            except Exception:
+                # Older builds only output BGRA
+                self._convert_bgra = True
+        except Exception as e:
+            logger.error(f"cudacodec failed to open {url}: {e}")
+            self.reader = None
+    
+    def isOpened(self) -> bool:
+        """Check whether the stream is open."""
+        return self.reader is not None
+    
+    def read_gpu(self):
+        """Decode the next frame as a BGR GpuMat."""
+        try:
+            ok, gpu_image = self.reader.nextFrame()
+            if not ok:
+                return False, None
+            if self._convert_bgra:
+                gpu_image = cv2.cuda.cvtColor(gpu_image, cv2.COLOR_BGRA2BGR)
+            return True, gpu_image
+        except Exception:
+            return False, None
+    
+    def read(self):
+        """Decode the next frame as a BGR numpy array."""
+        ok, gpu_image = self.read_gpu()
+        return (True, gpu_image.download()) if ok else (False, None)
+    
+    def set(self, prop_id, value) -> bool:
+        """Capture properties are not supported; present for API compatibility."""
+        return False
+    
+    def release(self):
+        """Close the stream."""
+        self.reader = None
+
+
+class PyAVCapture:
+    """
+    Minimal cv2.VideoCapture-compatible reader backed by PyAV (FFmpeg).
+    
+    Decoding runs inside FFmpeg with the GIL released, and can use a
+    hardware decoder (cuda, vaapi, videotoolbox, ...) when PyAV supports it.
+    """
+    
+    def __init__(self, url: str, hwaccel: Optional[str] = None):
+        """
+        Open a stream with PyAV.
+        
+        Args:
+            url: Stream URL or file path
+            hwaccel: Optional FFmpeg hardware device type (e.g. "cuda")
+        """
+        self.container = None
+        self._frames = None
+        
+        options = {"rtsp_transport": "tcp"} if str(url).startswith("rtsp") else {}
+        open_kwargs = {"options": options, "timeout": 10}
+        
+        if hwaccel:
+            try:
+                from av.codec.hwaccel import HWAccel
+                open_kwargs["hwaccel"] = HWAccel(device_type=hwaccel, allow_software_fallback=True)
+            except ImportError:
+                logger.warning(f"PyAV {av.__version__} has no hwaccel support, using software decode")
+        
+        try:
+            self.container = av.open(url, **open_kwargs)
+            stream = self.container.streams.video[0]
+            stream.thread_type = "AUTO"
+            self._frames = self.container.decode(stream)
+        except Exception as e:
+            logger.error(f"PyAV failed to open {url}: {e}")
+            self.release()
+    
+    def isOpened(self) -> bool:
+        """Check whether the stream is open."""
+        return self.container is not None
+    
+    def read(self):
+        """Decode the next frame as a BGR numpy array."""
+        try:
+            frame = next(self._frames)
+            return True, frame.to_ndarray(format="bgr24")
+        except Exception:
+            return False, None
+    
+    def set(self, prop_id, value) -> bool:
+        """Capture properties are not supported; present for API compatibility."""
+        return False
+    
+    def release(self):
+        """Close the stream."""
+        if self.container is not None:
+            self.container.close()
+        self.container = None
+        self._frames = None
 
 
 class CameraStream:
     """Individual camera stream handler."""
     
-    def __init__(self, camera_config: dict):
+    def __init__(self, camera_config: dict, frame_sink: Optional[SimpleQueue] = None):
         """
         Initialize camera stream.
         
         Args:
             camera_config: Camera configuration dictionary
+            frame_sink: Optional queue shared across cameras that also
+                receives every captured frame as (camera_id, frame)
         """
         self.id = camera_config['id']
         self.name = camera_config['name']
         self.url = camera_config['url']
         self.enabled = camera_config.get('enabled', True)
         self.fps = camera_config.get('fps', 25)
+        self.resolution = camera_config.get('resolution')  # Optional [width, height]
+        self.decoder = camera_config.get('decoder', 'opencv')  # "opencv", "pyav" or "cudacodec"
+        self.hwaccel = camera_config.get('hwaccel')  # e.g. "cuda", "vaapi" (pyav only)
         
         self.cap = None
         self.thread = None
         self.running = False
-        self.frame_queue = Queue(maxsize=10)
+        self._latest: Optional[Frame] = None  # Latest frame only (atomic swap under the GIL)
+        self.frame_sink = frame_sink
         self.frame_number = 0
         self.last_frame_time = 0
         self.reconnect_attempts = 0
@@ -61,6 +205,9 @@ class CameraStream:
     
     def _capture_loop(self):
         """Main capture loop running in separate thread."""
+        frame_period = 1.0 / self.fps
+        next_deadline = time.monotonic()
+        
         while self.running:
             try:
                 # Connect to camera if not connected
@@ -70,10 +217,17 @@ class CameraStream:
                         time.sleep(5)  # Wait before retry
                         continue
                 
-                # Read frame
-                ret, image = self.cap.read()
+                # Read frame (GPU-decoded frames stay on the GPU until needed)
+                gpu_image = None
+                if isinstance(self.cap, CudaCodecCapture):
+                    ret, gpu_image = self.cap.read_gpu()
+                    image = None
+                    ok = ret and gpu_image is not None
+                else:
+                    ret, image = self.cap.read()
+                    ok = ret and image is not None
                 
-                if not ret or image is None:
+                if not ok:
                     logger.warning(f"Failed to read frame from {self.name}")
                     self._reconnect()
                     continue
@@ -83,22 +237,30 @@ class CameraStream:
                     camera_id=self.id,
                     timestamp=time.time(),
                     image=image,
-                    resolution=(image.shape[1], image.shape[0]),
-                    frame_number=self.frame_number
+                    resolution=gpu_image.size() if gpu_image is not None else (image.shape[1], image.shape[0]),
+                    frame_number=self.frame_number,
+                    gpu_image=gpu_image
                 )
                 
-                # Add to queue (non-blocking)
-                try:
-                    self.frame_queue.put(frame, block=False)
-                    self.frame_number += 1
-                    self.last_frame_time = time.time()
-                    self.reconnect_attempts = 0  # Reset on success
-                except Full:
-                    # Queue full, drop frame
-                    pass
+                # Publish, replacing any frame the consumer has not picked
+                # up yet so it always gets the newest
+                self._latest = frame
+                self.frame_number += 1
+                self.last_frame_time = time.time()
+                self.reconnect_attempts = 0  # Reset on success
                 
-                # Frame rate control
-                time.sleep(1.0 / self.fps)
+                if self.frame_sink is not None:
+                    self.frame_sink.put((self.id, frame))
+                
+                # Frame rate control: sleep only for what is left of this
+                # frame's slot so decode time is not added on top
+                next_deadline += frame_period
+                sleep_for = next_deadline - time.monotonic()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+                elif sleep_for < -frame_period:
+                    # Fell behind (slow source or reconnect), don't burst to catch up
+                    next_deadline = time.monotonic()
                 
             except Exception as e:
                 logger.error(f"Error in capture loop for {self.name}: {e}")
@@ -109,7 +271,20 @@ class CameraStream:
         """Connect to camera stream."""
         try:
             logger.info(f"Connecting to {self.name} at {self.url}")
-            self.cap = cv2.VideoCapture(self.url)
+            if self._is_local_device():
+                self.cap = self._open_local_device()
+            elif self.decoder == "pyav" and av is not None:
+                self.cap = PyAVCapture(self.url, self.hwaccel)
+            elif self.decoder == "cudacodec" and cudacodec_available():
+                self.cap = CudaCodecCapture(self.url)
+            else:
+                if self.decoder == "pyav":
+                    logger.warning("PyAV not installed, falling back to OpenCV decoding")
+                elif self.decoder == "cudacodec":
+                    logger.warning("OpenCV CUDA video decoding unavailable, falling back to CPU decoding")
+                self.cap = self._open_network_stream()
+                # Read the freshest frame rather than a backlog
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
             if self.cap.isOpened():
                 logger.success(f"Connected to {self.name}")
@@ -123,6 +298,41 @@ class CameraStream:
             self.cap = None
             return False
     
+    def _is_local_device(self) -> bool:
+        """Check whether the camera URL refers to a local capture device."""
+        url = str(self.url)
+        return url.isdigit() or url.startswith("/dev/video")
+    
+    def _open_local_device(self):
+        """Open a local (USB) camera with compressed capture and a minimal buffer."""
+        source = int(self.url) if str(self.url).isdigit() else self.url
+        
+        if sys.platform.startswith("linux"):
+            cap = cv2.VideoCapture(source, cv2.CAP_V4L2)
+        else:
+            cap = cv2.VideoCapture(source)
+        
+        if cap.isOpened():
+            # MJPEG moves far fewer bytes over USB than raw YUYV
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            if self.resolution:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+            # Keep only the newest frame queued in the driver
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        return cap
+    
+    def _open_network_stream(self):
+        """Open a network/file stream, forcing FFmpeg over TCP for RTSP."""
+        if str(self.url).lower().startswith("rtsp"):
+            # UDP RTSP drops packets under load, which corrupts frames and
+            # forces costly re-decodes; must be set before the first open
+            os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp")
+            return cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        
+        return cv2.VideoCapture(self.url)
+    
     def _reconnect(self):
         """Reconnect to camera after failure."""
         if self.cap:
@@ -141,14 +351,13 @@ class CameraStream:
     
     def get_frame(self) -> Optional[Frame]:
         """
-        Get latest frame from queue.
+        Get latest frame.
         
         Returns:
-            Frame object or None if queue is empty
+            Frame object or None if no new frame since the last call
         """
-        if not self.frame_queue.empty():
-            return self.frame_queue.get()
-        return None
+        frame, self._latest = self._latest, None
+        return frame
     
     def is_active(self) -> bool:
         """Check if camera is actively producing frames."""
@@ -181,11 +390,19 @@ class CameraManager:
         self.config = config
         self.cameras: Dict[str, CameraStream] = {}
         
+        # Every camera publishes into one queue so consumers can block on
+        # "any frame ready" instead of polling each camera
+        self._frame_queue: SimpleQueue = SimpleQueue()
+        
+        # How long to wait for the other cameras once a frame has arrived,
+        # so the detector gets one batch per tick instead of stragglers
+        self.batch_window = config.get("performance.batch_window_ms", 10) / 1000.0
+        
         # Load camera configurations
         camera_configs = config.get("cameras", [])
         
         for cam_config in camera_configs:
-            camera = CameraStream(cam_config)
+            camera = CameraStream(cam_config, self._frame_queue)
             self.cameras[camera.id] = camera
         
         logger.info(f"Camera manager initialized with {len(self.cameras)} cameras")
@@ -203,21 +420,60 @@ class CameraManager:
         active = self.active_count()
         logger.success(f"Camera manager started: {active}/{len(self.cameras)} cameras active")
     
-    def get_frames(self) -> List[Frame]:
+    def get_frames(self, timeout: Optional[float] = None,
+                   batch_window: Optional[float] = None) -> List[Frame]:
         """
         Get latest frames from all cameras.
         
+        Args:
+            timeout: Seconds to wait for the first frame (None: don't wait)
+            batch_window: Seconds to keep collecting after the first frame
+                until every active camera has delivered (None: configured default)
+            
         Returns:
-            List of Frame objects
+            List of Frame objects, at most one (the newest) per camera
         """
-        frames = []
+        latest: Dict[str, Frame] = {}
         
-        for camera in self.cameras.values():
-            frame = camera.get_frame()
-            if frame:
-                frames.append(frame)
+        try:
+            if timeout:
+                camera_id, frame = self._frame_queue.get(timeout=timeout)
+            else:
+                camera_id, frame = self._frame_queue.get_nowait()
+        except Empty:
+            return []
+        latest[camera_id] = frame
+        
+        window = self.batch_window if batch_window is None else batch_window
+        deadline = time.monotonic() + window
+        
+        try:
+            # Drain everything else that is already waiting
+            while True:
+                camera_id, frame = self._frame_queue.get_nowait()
+                latest[camera_id] = frame
+        except Empty:
+            pass
+        
+        # Opportunistic batching: briefly wait for active cameras that have
+        # not delivered yet; failed or disconnected ones would only run out
+        # the window
+        pending = {
+            camera_id for camera_id, camera in self.cameras.items()
+            if camera_id not in latest and camera.is_active()
+        }
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                camera_id, frame = self._frame_queue.get(timeout=remaining)
+                latest[camera_id] = frame
+                pending.discard(camera_id)
+        except Empty:
+            pass
         
-        return frames
+        return list(latest.values())
     
     def active_count(self) -> int:
         """Get count of active cameras."""
@@ -1,16 +1,213 @@
 """Object detector module - Enhanced YOLO-based implementation."""
+import glob
 import os
+import re
+import shutil
+import sys
 import time
-from typing import List, Optional, Dict, Tuple
+import threading
+from collections import Counter, deque
+from fractions import Fraction
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
 from dataclasses import dataclass
 import cv2
 import numpy as np
 import torch
+import yaml
 from ultralytics import YOLO
 from loguru import logger
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
-@dataclass
+
+@lru_cache(maxsize=512)
+def _render_label(label: str, color: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Render a filled label box with white text.
+    
+    Labels are low-cardinality (class name + 2-digit confidence), so caching
+    the bitmap avoids measuring and rasterizing the same text every frame.
+    """
+    (label_w, label_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+    # cv2.rectangle end points are inclusive, hence the extra row and column
+    patch = np.empty((label_h + 11, label_w + 1, 3), dtype=np.uint8)
+    patch[:] = color
+    cv2.putText(patch, label, (0, label_h + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    return patch
+
+
+def _blit_label(image: np.ndarray, patch: np.ndarray, x: int, bottom: int):
+    """Copy a label patch into image with its bottom-left pixel at (x, bottom)."""
+    height, width = patch.shape[:2]
+    top = bottom - height + 1
+    
+    # Clip to image bounds
+    src_x0, src_y0 = max(0, -x), max(0, -top)
+    dst_x0, dst_y0 = max(0, x), max(0, top)
+    dst_x1 = min(image.shape[1], x + width)
+    dst_y1 = min(image.shape[0], bottom + 1)
+    if dst_x1 <= dst_x0 or dst_y1 <= dst_y0:
+        return
+    
+    image[dst_y0:dst_y1, dst_x0:dst_x1] = patch[
+        src_y0:src_y0 + (dst_y1 - dst_y0), src_x0:src_x0 + (dst_x1 - dst_x0)
+    ]
+
+
+def _cv2_cuda_available() -> bool:
+    """Check whether OpenCV was built with CUDA and a GPU is present."""
+    try:
+        return hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
+
+def _nms_per_class(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                   iou_threshold: float) -> np.ndarray:
+    """
+    Greedy per-class non-maximum suppression.
+    
+    Uses OpenCV's native batched NMS when available, otherwise NumPy.
+    
+    Args:
+        boxes: (N, 4) integer array of x1, y1, x2, y2
+        scores: (N,) confidences
+        class_ids: (N,) class ids; boxes only suppress boxes of the same class
+        iou_threshold: Boxes overlapping a kept box by more than this are dropped
+        
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if hasattr(cv2.dnn, "NMSBoxesBatched"):
+        return _nms_per_class_opencv(boxes, scores, class_ids, iou_threshold)
+    if njit is not None:
+        return _nms_per_class_numba(boxes, scores, class_ids, iou_threshold)
+    return _nms_per_class_numpy(boxes, scores, class_ids, iou_threshold)
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _iou_matrix(boxes: np.ndarray) -> np.ndarray:
+        """Pairwise IoU of (N, 4) x1, y1, x2, y2 boxes (0 where union is 0)."""
+        n = boxes.shape[0]
+        iou = np.zeros((n, n), dtype=np.float64)
+        for i in prange(n):
+            area_i = (boxes[i, 2] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 1])
+            for j in range(i + 1, n):
+                w = min(boxes[i, 2], boxes[j, 2]) - max(boxes[i, 0], boxes[j, 0])
+                h = min(boxes[i, 3], boxes[j, 3]) - max(boxes[i, 1], boxes[j, 1])
+                if w <= 0.0 or h <= 0.0:
+                    continue
+                inter = w * h
+                union = area_i + (boxes[j, 2] - boxes[j, 0]) * (boxes[j, 3] - boxes[j, 1]) - inter
+                if union > 0.0:
+                    iou[i, j] = inter / union
+                    iou[j, i] = iou[i, j]
+        return iou
+    
+    @njit(cache=True)
+    def _greedy_keep(iou: np.ndarray, order: np.ndarray, class_ids: np.ndarray,
+                     iou_threshold: float) -> np.ndarray:
+        """Greedy pick in score order; a kept box suppresses same-class overlaps."""
+        n = order.shape[0]
+        keep = np.zeros(n, dtype=np.bool_)
+        suppressed = np.zeros(n, dtype=np.bool_)
+        for a in range(n):
+            i = order[a]
+            if suppressed[i]:
+                continue
+            keep[i] = True
+            for b in range(a + 1, n):
+                j = order[b]
+                if class_ids[j] == class_ids[i] and iou[i, j] > iou_threshold:
+                    suppressed[j] = True
+        return keep
+
+
+def _nms_per_class_numba(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                         iou_threshold: float) -> np.ndarray:
+    """Per-class NMS with Numba-compiled IoU and greedy kernels (see _nms_per_class)."""
+    order = np.argsort(-scores, kind="stable")
+    iou = _iou_matrix(np.ascontiguousarray(boxes, dtype=np.float64))
+    keep = _greedy_keep(iou, order, np.ascontiguousarray(class_ids, dtype=np.int64), float(iou_threshold))
+    return order[keep[order]]
+
+
+def _nms_per_class_opencv(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                          iou_threshold: float) -> np.ndarray:
+    """Per-class NMS via cv2.dnn.NMSBoxesBatched (see _nms_per_class)."""
+    order = np.argsort(-scores, kind="stable")
+    wh = boxes[:, 2:] - boxes[:, :2]
+    
+    # Empty boxes never overlap anything, so they are always kept; OpenCV
+    # would drop them
+    positive = (wh > 0).all(axis=1)
+    candidates = np.flatnonzero(positive)
+    xywh = np.concatenate([boxes[:, :2], wh], axis=1)[candidates]
+    
+    kept = cv2.dnn.NMSBoxesBatched(
+        xywh.tolist(), scores[candidates].tolist(), class_ids[candidates].tolist(),
+        0.0, iou_threshold
+    )
+    keep = ~positive
+    keep[candidates[np.asarray(kept, dtype=np.int64).reshape(-1)]] = True
+    
+    return order[keep[order]]
+
+
+def _nms_per_class_numpy(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                         iou_threshold: float) -> np.ndarray:
+    """
+    Greedy per-class non-maximum suppression in NumPy.
+    
+    Works in integer arithmetic: IoU > num/den is tested as
+    inter * den > union * num, so no per-pair division is needed.
+    
+    Args:
+        boxes: (N, 4) integer array of x1, y1, x2, y2
+        scores: (N,) confidences
+        class_ids: (N,) class ids; boxes only suppress boxes of the same class
+        iou_threshold: Boxes overlapping a kept box by more than this are dropped
+        
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    order = np.argsort(-scores, kind="stable")
+    x1, y1, x2, y2 = boxes.astype(np.int64).T
+    areas = (x2 - x1) * (y2 - y1)
+    keep = np.zeros(len(order), dtype=bool)
+    
+    threshold = Fraction(iou_threshold).limit_denominator(1000)
+    num, den = threshold.numerator, threshold.denominator
+    
+    for class_id in np.unique(class_ids):
+        idxs = order[class_ids[order] == class_id]
+        while idxs.size:
+            i = idxs[0]
+            keep[i] = True
+            rest = idxs[1:]
+            
+            # IoU of the kept box against all remaining boxes of its class
+            w = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+            h = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            inter = w * h
+            union = areas[i] + areas[rest] - inter
+            overlapping = (union > 0) & (inter * den > union * num)
+            
+            idxs = rest[~overlapping]
+    
+    return order[keep[order]]
+
+
+# Slotted dataclasses (Python 3.10+) drop the per-instance __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Detection:
     """Detection result data structure."""
     bbox: tuple  # (x1, y1, x2, y2)
@@ -19,15 +216,156 @@ class Detection:
     class_name: str
     center_point: tuple  # (x, y)
     area: float
-    aspect_ratio: float = 0.0
+    aspect_ratio: Optional[float] = None  # Derived from bbox unless given
     keypoints: Optional[List] = None  # For pose estimation
     
     def __post_init__(self):
         """Calculate additional properties after initialization."""
-        x1, y1, x2, y2 = self.bbox
-        width = x2 - x1
-        height = y2 - y1
-        self.aspect_ratio = width / height if height > 0 else 0.0
+        if self.aspect_ratio is None:
+            x1, y1, x2, y2 = self.bbox
+            width = x2 - x1
+            height = y2 - y1
+            self.aspect_ratio = width / height if height > 0 else 0.0
+
+
+class DetectionBatch:
+    """
+    Detections for one frame stored as parallel NumPy arrays.
+    
+    Behaves like a read-only List[Detection] (len, iteration, indexing) so
+    existing consumers keep working, while filters run as vectorized masks.
+    Detection objects are only built when an element is actually accessed.
+    """
+    
+    def __init__(self, bboxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray,
+                 class_names: np.ndarray, centers: np.ndarray, areas: np.ndarray,
+                 detections: Optional[List[Detection]] = None):
+        """
+        Initialize batch from per-detection arrays.
+        
+        Args:
+            bboxes: (N, 4) int32 array of x1, y1, x2, y2
+            confidences: (N,) float32 array
+            class_ids: (N,) int32 array
+            class_names: (N,) object array of class name strings
+            centers: (N, 2) int32 array of center points
+            areas: (N,) float32 array
+            detections: Already built Detection objects matching the arrays
+        """
+        self.bboxes = bboxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.class_names = class_names
+        self.centers = centers
+        self.areas = areas
+        self._detections = detections
+    
+    @classmethod
+    def from_detections(cls, detections: Iterable[Detection]) -> "DetectionBatch":
+        """Build a batch from existing Detection objects."""
+        detections = list(detections)
+        count = len(detections)
+        
+        return cls(
+            bboxes=np.array([d.bbox for d in detections], dtype=np.int32).reshape(count, 4),
+            confidences=np.array([d.confidence for d in detections], dtype=np.float32),
+            class_ids=np.array([d.class_id for d in detections], dtype=np.int32),
+            class_names=np.array([d.class_name for d in detections], dtype=object),
+            centers=np.array([d.center_point for d in detections], dtype=np.int32).reshape(count, 2),
+            areas=np.array([d.area for d in detections], dtype=np.float32),
+            detections=detections
+        )
+    
+    @classmethod
+    def from_arrays(cls, xyxy: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray,
+                    class_names: np.ndarray) -> "DetectionBatch":
+        """
+        Build a batch from raw model outputs without creating Detection objects.
+        
+        Args:
+            xyxy: (N, 4) float array of x1, y1, x2, y2
+            confidences: (N,) float array
+            class_ids: (N,) integer array
+            class_names: (N,) object array of class name strings
+            
+        Returns:
+            DetectionBatch with integer boxes, centers and areas derived from xyxy
+        """
+        return cls(
+            bboxes=xyxy.astype(np.int32),
+            confidences=confidences.astype(np.float32, copy=False),
+            class_ids=class_ids.astype(np.int32, copy=False),
+            class_names=class_names,
+            centers=((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32),
+            areas=((xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])).astype(np.float32, copy=False)
+        )
+    
+    @property
+    def aspect_ratios(self) -> np.ndarray:
+        """Width / height per detection (0 where height is 0), as float64."""
+        widths = (self.bboxes[:, 2] - self.bboxes[:, 0]).astype(np.float64)
+        heights = (self.bboxes[:, 3] - self.bboxes[:, 1]).astype(np.float64)
+        return np.divide(widths, heights, out=np.zeros_like(widths), where=heights > 0)
+    
+    def select(self, mask) -> "DetectionBatch":
+        """
+        Get the subset of detections selected by a boolean mask or index array.
+        
+        Args:
+            mask: Boolean mask, integer index array or slice
+            
+        Returns:
+            New DetectionBatch sharing no state with this one
+        """
+        detections = None
+        if self._detections is not None:
+            indices = np.arange(len(self))[mask]
+            detections = [self._detections[i] for i in indices]
+        
+        return DetectionBatch(
+            bboxes=self.bboxes[mask],
+            confidences=self.confidences[mask],
+            class_ids=self.class_ids[mask],
+            class_names=self.class_names[mask],
+            centers=self.centers[mask],
+            areas=self.areas[mask],
+            detections=detections
+        )
+    
+    def _materialize(self) -> List[Detection]:
+        """Build (once) the Detection objects for this batch."""
+        if self._detections is None:
+            self._detections = [
+                Detection(
+                    bbox=tuple(bbox),
+                    confidence=confidence,
+                    class_id=class_id,
+                    class_name=class_name,
+                    center_point=tuple(center),
+                    area=area,
+                    aspect_ratio=aspect_ratio
+                )
+                for bbox, confidence, class_id, class_name, center, area, aspect_ratio in zip(
+                    self.bboxes.tolist(), self.confidences.tolist(), self.class_ids.tolist(),
+                    self.class_names.tolist(), self.centers.tolist(), self.areas.tolist(),
+                    self.aspect_ratios.tolist()
+                )
+            ]
+        return self._detections
+    
+    def __len__(self) -> int:
+        return len(self.class_ids)
+    
+    def __iter__(self) -> Iterator[Detection]:
+        return iter(self._materialize())
+    
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._materialize()[key]
+        return self.select(key)
+    
+    def __repr__(self) -> str:
+        return repr(self._materialize())
 
 
 class ObjectDetector:
@@ -43,11 +381,32 @@ class ObjectDetector:
         26: "handbag", 27: "tie", 28: "suitcase"
     }
     
+    COCO_NAME_TO_ID = {name: idx for idx, name in COCO_CLASSES.items()}
+    
     # Enhanced class categories for better filtering
     HUMAN_CLASSES = ["person"]
     VEHICLE_CLASSES = ["car", "truck", "bus", "motorcycle", "bicycle", "airplane", "boat", "train"]
     ANIMAL_CLASSES = ["dog", "cat", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "bird"]
     
+    # Category class ids, for masking DetectionBatch.class_ids directly
+    HUMAN_CLASS_IDS = np.array(list(map(COCO_NAME_TO_ID.get, HUMAN_CLASSES)), dtype=np.int32)
+    VEHICLE_CLASS_IDS = np.array(list(map(COCO_NAME_TO_ID.get, VEHICLE_CLASSES)), dtype=np.int32)
+    ANIMAL_CLASS_IDS = np.array(list(map(COCO_NAME_TO_ID.get, ANIMAL_CLASSES)), dtype=np.int32)
+    
+    # Drawing colors per class (BGR), gray for anything else
+    CLASS_COLORS = {
+        "person": (0, 255, 0),      # Green
+        "car": (255, 0, 0),         # Blue  
+        "truck": (255, 0, 255),     # Magenta
+        "motorcycle": (0, 255, 255), # Yellow
+        "bicycle": (255, 255, 0),   # Cyan
+        "bus": (128, 0, 128),       # Purple
+        "dog": (255, 165, 0),       # Orange
+        "cat": (255, 192, 203),     # Pink
+        "bird": (173, 216, 230),    # Light Blue
+    }
+    DEFAULT_COLOR = (128, 128, 128)
+    
     # Priority classes for security monitoring
     SECURITY_CLASSES = HUMAN_CLASSES + VEHICLE_CLASSES + ANIMAL_CLASSES
     
@@ -86,21 +445,67 @@ class ObjectDetector:
         self.confidence_threshold = config.get("processing.detection.confidence_threshold", 0.5)
         self.nms_threshold = config.get("processing.detection.nms_threshold", 0.4)
         self.input_size = config.get("processing.detection.input_size", [640, 640])
-        self.classes_filter = config.get("processing.detection.classes_filter", self.SECURITY_CLASSES)
+        self.set_classes_filter(config.get("processing.detection.classes_filter", self.SECURITY_CLASSES))
         self.batch_size = config.get("processing.detection.batch_size", 1)
+        self.backend = config.get("processing.detection.backend", "pytorch")  # pytorch, tensorrt, onnx or openvino
+        self.int8 = config.get("processing.detection.int8", False)
+        self.int8_calibration_data = config.get("processing.detection.int8_calibration_data")
+        self.cuda_graph = config.get("processing.detection.cuda_graph", False)
+        self.half = config.get("processing.detection.half", True)  # FP16 inference on CUDA
+        self.clahe_std_threshold = config.get("processing.detection.clahe_std_threshold", 45)
+        self.compile_model = config.get("processing.detection.compile", False)
+        self.cpu_threads = config.get("processing.detection.cpu_threads", max(1, (os.cpu_count() or 2) // 2))
         
         # Enhanced filtering options
         self.use_class_specific_thresholds = True
         self.use_size_filtering = True
         self.use_temporal_smoothing = True
         
+        # Per-class validation thresholds as arrays indexed by class id
+        self._build_validation_tables()
+        
+        # Drawing colors indexed by class id; the last row is the default
+        # for class ids without a color or outside the table
+        self._color_lut = np.array(
+            [self.DEFAULT_COLOR] * (max(self.COCO_CLASSES) + 2), dtype=np.int32
+        )
+        for class_id, class_name in self.COCO_CLASSES.items():
+            self._color_lut[class_id] = self.CLASS_COLORS.get(class_name, self.DEFAULT_COLOR)
+        self._color_tuples = [tuple(color) for color in self._color_lut.tolist()]
+        # Rows sharing a color share an id, so their boxes draw together
+        self._color_ids = np.unique(self._color_lut, axis=0, return_inverse=True)[1].ravel()
+        
         # Performance tracking
         self.detection_stats = {
             "total_detections": 0,
             "filtered_detections": 0,
-            "processing_times": [],
-            "class_counts": {}
+            "processing_times": deque(maxlen=1000),
+            "class_counts": Counter()
         }
+        self._processing_time_sum = 0.0
+        
+        # Per-thread CLAHE instance and scratch buffers, reused across
+        # frames of the same shape
+        self._preprocess_buffers = threading.local()
+        
+        # Resize and run CLAHE with cv2.cuda for frames decoded on the GPU, so
+        # they never take a full-resolution trip through host memory
+        self._gpu_preprocess = str(self.device).startswith("cuda") and _cv2_cuda_available()
+        
+        # CUDA input staging: pinned host buffers and persistent device
+        # buffers keyed by (chunk, batch size), and a side stream for uploads,
+        # set up in _load_model
+        self._staging_device = None
+        self._upload_stream = None
+        self._use_half = False
+        self._pinned_buffers: Dict[Tuple[int, int], "torch.Tensor"] = {}
+        self._device_buffers: Dict[Tuple[int, int], Tuple["torch.Tensor", "torch.Tensor"]] = {}
+        
+        # Captured CUDA graphs keyed by input shape (B, C, H, W)
+        self._cuda_graphs: Dict[Tuple[int, ...], Tuple] = {}
+        
+        # Serializes inference, which shares all of the state above
+        self._inference_lock = threading.Lock()
         
         # Initialize model
         self.model = None
@@ -157,17 +562,52 @@ class ObjectDetector:
                     logger.error("No local model found and download failed")
                     raise
             
+            # Swap in a TensorRT engine when configured and running on CUDA
+            if self.backend == "tensorrt":
+                self._load_tensorrt_engine(device, models_dir)
+            elif self.backend in ("onnx", "openvino"):
+                self._load_cpu_export(device, models_dir)
+            
             # Enhanced model configuration
             self._configure_model()
             
+            # Leave cores for the capture threads when inferring on CPU
+            if device == "cpu" and self.cpu_threads:
+                torch.set_num_threads(int(self.cpu_threads))
+                # All cameras share one batched forward pass, so intra-op
+                # threads are the only parallelism worth having; nested
+                # inter-op pools would oversubscribe the cores
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    pass  # Already fixed once any parallel work has run
+                logger.info(f"Using {torch.get_num_threads()} CPU inference threads")
+            
+            # Overlap host-to-device copies with inference on CUDA
+            if device.startswith("cuda"):
+                self._staging_device = torch.device(device)
+                self._upload_stream = torch.cuda.Stream(device=self._staging_device)
+                self._use_half = bool(self.half)
+            
             # Warm up model with dummy input
             try:
                 dummy_input = np.zeros((640, 640, 3), dtype=np.uint8)
-                _ = self.model(dummy_input, verbose=False)
+                _ = self.model(dummy_input, verbose=False, half=self._use_half)
                 logger.info("Model warmup completed")
+                
+                # Compile (or load cached) Numba NMS kernels before the first frame
+                if njit is not None:
+                    _nms_per_class_numba(
+                        np.array([[0, 0, 10, 10], [1, 1, 11, 11]], dtype=np.int32),
+                        np.array([0.9, 0.8]), np.zeros(2, dtype=np.int32), 0.5
+                    )
             except Exception as warmup_error:
                 logger.warning(f"Model warmup failed: {warmup_error}")
             
+            # Compile after warmup, once the predictor has built its backend
+            if device == "cpu" and self.compile_model:
+                self._compile_cpu_model()
+            
             self.is_loaded = True
             
         except Exception as e:
@@ -180,6 +620,165 @@ class ObjectDetector:
             self.is_loaded = False
             raise
     
+    def _load_tensorrt_engine(self, device: str, models_dir: str):
+        """
+        Replace the PyTorch model with a cached TensorRT engine.
+        
+        The engine is exported from the loaded .pt model on first use and
+        cached in models_dir per (GPU, input size, max batch, precision);
+        later starts load it directly. Falls back to the PyTorch model on any
+        failure.
+        """
+        if not device.startswith("cuda"):
+            logger.warning("TensorRT backend requires a CUDA device, using PyTorch")
+            return
+        
+        # Engines are tuned for one GPU model, so the GPU is part of the cache key
+        # The engine accepts batches up to batch_size, so detect_batch chunks
+        # from several cameras fit; a smaller cached engine is not reused
+        height, width = self._input_hw()
+        max_batch = max(1, int(self.batch_size))
+        precision = "int8" if self.int8 else "fp16"
+        gpu_name = re.sub(r"[^a-z0-9]+", "-", torch.cuda.get_device_name(device).lower()).strip("-")
+        engine_path = os.path.join(
+            models_dir, f"{self.model_name}_{gpu_name}_{height}x{width}_b{max_batch}_{precision}.engine"
+        )
+        
+        try:
+            if not os.path.exists(engine_path):
+                calibration_data = self._calibration_data(models_dir) if self.int8 else None
+                if self.int8 and not calibration_data:
+                    logger.warning(
+                        "INT8 export needs processing.detection.int8_calibration_data "
+                        f"or frames in {os.path.join(models_dir, 'calib')}, using PyTorch"
+                    )
+                    return
+                
+                logger.info(f"Exporting TensorRT {precision.upper()} engine (one-time, may take minutes)...")
+                exported_path = self.model.export(
+                    format="engine",
+                    half=not self.int8,
+                    int8=self.int8,
+                    data=calibration_data,
+                    imgsz=[height, width],
+                    batch=max_batch,
+                    dynamic=True,  # Any batch up to max_batch and letterboxed input shape
+                    device=device,
+                    workspace=4
+                )
+                shutil.move(str(exported_path), engine_path)
+                logger.success(f"TensorRT engine cached at {engine_path}")
+            
+            self.model = YOLO(engine_path, task="detect")
+            logger.success(f"Using TensorRT engine: {engine_path}")
+            
+            # Engines launch through their own execution context, which
+            # cannot be captured into a torch CUDA graph
+            self.cuda_graph = False
+            
+        except Exception as e:
+            logger.warning(f"TensorRT engine unavailable, using PyTorch model: {e}")
+    
+    def _load_cpu_export(self, device: str, models_dir: str):
+        """
+        Replace the PyTorch model with a cached ONNX Runtime or OpenVINO export.
+        
+        Both run fused, graph-optimized kernels that are typically several
+        times faster than eager PyTorch on CPU. The export is made from the
+        loaded .pt model on first use and cached in models_dir per input
+        size. Falls back to the PyTorch model on any failure.
+        """
+        if device != "cpu":
+            logger.warning(f"{self.backend} backend is for CPU inference, using PyTorch on {device}")
+            return
+        
+        height, width = self._input_hw()
+        suffix = ".onnx" if self.backend == "onnx" else "_openvino_model"
+        export_path = os.path.join(models_dir, f"{self.model_name}_{height}x{width}{suffix}")
+        
+        try:
+            if not os.path.exists(export_path):
+                logger.info(f"Exporting {self.backend} model (one-time)...")
+                exported_path = self.model.export(
+                    format=self.backend,
+                    imgsz=[height, width],
+                    dynamic=True,  # Any camera batch size
+                    simplify=True
+                )
+                shutil.move(str(exported_path), export_path)
+                logger.success(f"{self.backend} model cached at {export_path}")
+            
+            self.model = YOLO(export_path, task="detect")
+            logger.success(f"Using {self.backend} model: {export_path}")
+            
+        except Exception as e:
+            logger.warning(f"{self.backend} model unavailable, using PyTorch model: {e}")
+    
+    def _calibration_data(self, models_dir: str) -> Optional[str]:
+        """
+        Get the dataset YAML used to calibrate INT8 quantization.
+        
+        Uses processing.detection.int8_calibration_data when set. Otherwise,
+        if models_dir/calib holds representative camera frames (*.jpg,
+        *.png), writes a dataset YAML pointing at them.
+        
+        Args:
+            models_dir: Models directory
+            
+        Returns:
+            Path to the dataset YAML, or None if no calibration frames exist
+        """
+        if self.int8_calibration_data:
+            return self.int8_calibration_data
+        
+        calib_dir = os.path.abspath(os.path.join(models_dir, "calib"))
+        images = glob.glob(os.path.join(calib_dir, "*.jpg")) + glob.glob(os.path.join(calib_dir, "*.png"))
+        if not images:
+            return None
+        if len(images) < 100:
+            logger.warning(f"Only {len(images)} calibration frames in {calib_dir}; a few hundred are recommended")
+        
+        dataset_path = os.path.join(models_dir, "calib.yaml")
+        with open(dataset_path, "w") as f:
+            yaml.safe_dump({
+                "path": calib_dir,
+                "train": ".",
+                "val": ".",
+                "names": dict(self.model.names)
+            }, f)
+        return dataset_path
+    
+    def _compile_cpu_model(self):
+        """
+        Compile the PyTorch network for CPU inference.
+        
+        Uses torch.compile with dynamic shapes so a change in batch size
+        (e.g. a camera dropping out) does not recompile on the hot path.
+        Compilation is triggered here with a dummy input so the first
+        frame does not pay for it; on any failure the eager network is kept.
+        """
+        predictor = getattr(self.model, "predictor", None)
+        backend = getattr(predictor, "model", None)
+        network = getattr(backend, "model", None)
+        if not isinstance(network, torch.nn.Module):
+            logger.warning("Model compilation skipped: no PyTorch network to compile")
+            return
+        
+        height, width = self._input_hw()
+        example = torch.zeros(1, 3, height, width)
+        
+        try:
+            logger.info("Compiling model for CPU inference (one-time, may take a while)...")
+            compiled = torch.compile(network, dynamic=True)
+            
+            with torch.inference_mode():
+                compiled(example)
+            backend.model = compiled
+            logger.success("Model compiled for CPU inference")
+            
+        except Exception as e:
+            logger.warning(f"Model compilation failed, using eager model: {e}")
+    
     def _configure_model(self):
         """Configure model for enhanced performance."""
         try:
@@ -195,7 +794,7 @@ class ObjectDetector:
         except Exception as e:
             logger.warning(f"Model configuration warning: {e}")
     
-    def detect(self, frame) -> List[Detection]:
+    def detect(self, frame) -> DetectionBatch:
         """
         Enhanced detect objects in frame with better filtering.
         
@@ -203,77 +802,418 @@ class ObjectDetector:
             frame: Frame object with image data
             
         Returns:
-            List of Detection objects
+            DetectionBatch of detections (iterates as Detection objects)
+        """
+        return self.detect_batch([frame])[0]
+    
+    def detect_batch(self, frames: List) -> List[DetectionBatch]:
+        """
+        Detect objects in several frames with batched forward passes.
+        
+        Frames (typically one per camera) are preprocessed and sent to the
+        model in chunks of up to batch_size images, which amortizes launch
+        overhead and keeps the GPU busy. One detector (and one copy of the
+        weights) serves every camera.
+        
+        Safe to call from several threads: the staging buffers, CUDA graphs
+        and predictor are shared by the instance, so calls run one at a time.
+        
+        Args:
+            frames: Frame objects with image data
+            
+        Returns:
+            One DetectionBatch per input frame, in input order
         """
+        with self._inference_lock:
+            return self._detect_batch(frames)
+    
+    @torch.inference_mode()
+    def _detect_batch(self, frames: List) -> List[DetectionBatch]:
+        """Run detect_batch; the caller holds the inference lock."""
+        outputs = [DetectionBatch.from_detections([]) for _ in frames]
         if not self.is_loaded:
             logger.warning("Model not loaded, skipping detection")
-            return []
+            return outputs
+        
+        # Scale each frame into the model input size once, keeping its aspect
+        # ratio as the model was trained, then pre-process the small image
+        # for better detection; boxes are mapped back afterwards
+        sources = []
+        for index, frame in enumerate(frames):
+            processed = None
+            if self._gpu_preprocess and frame.gpu_image is not None:
+                processed = self._preprocess_image_gpu(frame.gpu_image)
+                source_width, source_height = frame.gpu_image.size()
+            image = None
+            if processed is None:
+                image = frame.to_cpu()
+                if image is None:
+                    continue
+                source_height, source_width = image.shape[:2]
+            sources.append((index, image, processed, (source_height, source_width)))
+        
+        batch_size = max(1, int(self.batch_size))
+        images = []
+        indices = []
+        transforms = []
+        for position, (index, image, processed, source_size) in enumerate(sources):
+            content_height, content_width, scale, pad_x, pad_y = self._letterbox_geometry(*source_size)
+            
+            # On CUDA, letterbox straight into the pinned upload buffer
+            target = None
+            if self._staging_device is not None:
+                try:
+                    target = self._pinned_slot(position, len(sources), batch_size)
+                except Exception as e:
+                    logger.warning(f"CUDA input staging unavailable, using host images: {e}")
+                    self._staging_device = None
+            
+            if target is None:
+                if processed is None:
+                    resized = self._resize_to_input(image, slot=position)
+                    processed = self._preprocess_image(resized, slot=position)
+                images.append(processed)
+                # Ultralytics pads host images itself and maps boxes back to them
+                transforms.append(((scale, 0, 0), source_size))
+            else:
+                content = target[pad_y:pad_y + content_height, pad_x:pad_x + content_width]
+                if processed is None:
+                    # With top/bottom padding only, the content rows are one
+                    # contiguous block and can be written in place
+                    direct = content if content.flags.c_contiguous else None
+                    resized = self._resize_to_input(image, slot=position, out=direct)
+                    processed = self._preprocess_image(resized, slot=position, out=direct)
+                if processed.__array_interface__["data"][0] != content.__array_interface__["data"][0]:
+                    np.copyto(content, processed)
+                self._fill_letterbox_border(target, content_height, content_width, pad_x, pad_y)
+                images.append(target)
+                transforms.append(((scale, pad_x, pad_y), source_size))
+            indices.append(index)
+        
+        chunks = [images[offset:offset + batch_size] for offset in range(0, len(images), batch_size)]
+        
+        # On CUDA, queue every chunk's upload up front so later copies overlap
+        # earlier chunks' inference
+        staged = [None] * len(chunks)
+        if self._staging_device is not None:
+            try:
+                staged = [self._stage_batch(i, chunk) for i, chunk in enumerate(chunks)]
+            except Exception as e:
+                logger.warning(f"CUDA input staging unavailable, using host images: {e}")
+                self._staging_device = None
+        
+        for chunk_number, chunk in enumerate(chunks):
+            offset = chunk_number * batch_size
+            chunk_indices = indices[offset:offset + batch_size]
+            chunk_transforms = transforms[offset:offset + batch_size]
+            
+            try:
+                start_time = time.time()
+                
+                model_input = chunk
+                if staged[chunk_number] is not None:
+                    model_input, upload_done = staged[chunk_number]
+                    compute_stream = torch.cuda.current_stream(self._staging_device)
+                    compute_stream.wait_event(upload_done)
+                    model_input.record_stream(compute_stream)
+                
+                # Replay a captured CUDA graph for fixed-shape device batches
+                boxes = None
+                if self.cuda_graph and staged[chunk_number] is not None:
+                    boxes = self._graph_predict(model_input)
+                
+                if boxes is None:
+                    # Run inference with enhanced parameters
+                    results = self.model(
+                        model_input,
+                        conf=self.confidence_threshold,
+                        iou=self.nms_threshold,
+                        imgsz=self.input_size,
+                        verbose=False,
+                        save=False,
+                        half=self._use_half,
+                        classes=self._class_indices
+                    )
+                    boxes = [self._result_boxes(result) for result in results]
+                
+                frame_time = (time.time() - start_time) / len(chunk)
+                for index, image_boxes, (letterbox, source_size) in zip(chunk_indices, boxes, chunk_transforms):
+                    detections = self._boxes_to_detections(image_boxes, letterbox, source_size)
+                    
+                    # Update statistics
+                    self._update_stats(detections, frame_time)
+                    
+                    # Log performance (loguru formats the arguments only if
+                    # debug output is enabled)
+                    if len(detections) > 0:
+                        logger.debug(
+                            "Detected {} objects in {:.3f}s (camera: {})",
+                            len(detections), frame_time, frames[index].camera_id
+                        )
+                    
+                    outputs[index] = detections
+                
+            except Exception as e:
+                logger.error(f"Error during detection: {e}")
         
+        return outputs
+    
+    def _stage_batch(self, chunk_number: int, images: List[np.ndarray]):
+        """
+        Copy images into a pinned buffer and upload them on the side stream.
+        
+        Args:
+            chunk_number: Position of the chunk in this call; each position
+                owns its own pinned buffer so queued copies never alias
+            images: Preprocessed BGR images at the model input size
+            
+        Returns:
+            Tuple of (normalized RGB BCHW tensor on the device, FP16 when
+            running in half precision, and the upload completion event)
+        """
+        pinned = self._pinned_buffer(chunk_number, len(images))
+        host = pinned.numpy()
+        for i, image in enumerate(images):
+            # Images preprocessed in place are already in the buffer
+            if image.__array_interface__["data"][0] != host[i].__array_interface__["data"][0]:
+                np.copyto(host[i], image)
+        
+        with torch.cuda.stream(self._upload_stream):
+            # Reuse this chunk position's device buffers across calls; wait for
+            # inference still reading them from an earlier call
+            self._upload_stream.wait_stream(torch.cuda.current_stream(self._staging_device))
+            raw, batch = self._device_batch_buffers(chunk_number, pinned)
+            raw.copy_(pinned, non_blocking=True)
+            # BHWC BGR to BCHW RGB one channel at a time, converting straight
+            # into the buffer (flip() would allocate a temporary)
+            for channel in range(3):
+                batch[:, channel].copy_(raw[..., 2 - channel])
+            batch.div_(255.0)
+            upload_done = torch.cuda.Event()
+            upload_done.record(self._upload_stream)
+        
+        return batch, upload_done
+    
+    def _pinned_buffer(self, chunk_number: int, count: int) -> "torch.Tensor":
+        """Get the pinned (count, H, W, 3) uint8 upload buffer for a chunk position."""
+        key = (chunk_number, count)
+        pinned = self._pinned_buffers.get(key)
+        if pinned is None:
+            height, width = self._input_hw()
+            pinned = torch.empty((count, height, width, 3), dtype=torch.uint8, pin_memory=True)
+            self._pinned_buffers[key] = pinned
+        return pinned
+    
+    def _device_batch_buffers(self, chunk_number: int, pinned: "torch.Tensor"):
+        """
+        Get the persistent device buffers a chunk position uploads into.
+        
+        Args:
+            chunk_number: Position of the chunk in the call
+            pinned: The chunk's pinned (B, H, W, 3) host buffer
+            
+        Returns:
+            Tuple of (uint8 BHWC upload buffer, normalized BCHW model input
+            buffer in the inference precision)
+        """
+        key = (chunk_number, pinned.shape[0])
+        dtype = torch.float16 if self._use_half else torch.float32
+        buffers = self._device_buffers.get(key)
+        if buffers is None or buffers[0].shape != pinned.shape or buffers[1].dtype != dtype:
+            count, height, width, channels = pinned.shape
+            raw = torch.empty(pinned.shape, dtype=torch.uint8, device=self._staging_device)
+            batch = torch.empty((count, channels, height, width), dtype=dtype, device=self._staging_device)
+            buffers = (raw, batch)
+            self._device_buffers[key] = buffers
+        return buffers
+    
+    def _pinned_slot(self, position: int, total: int, batch_size: int) -> np.ndarray:
+        """
+        Get the pinned host slot that the image at a batch position uploads from.
+        
+        Args:
+            position: Index of the image among all images of the call
+            total: Number of images in the call
+            batch_size: Images per chunk
+            
+        Returns:
+            (H, W, 3) uint8 view into the chunk's pinned buffer
+        """
+        chunk_number, offset = divmod(position, batch_size)
+        count = min(batch_size, total - chunk_number * batch_size)
+        return self._pinned_buffer(chunk_number, count).numpy()[offset]
+    
+    def _input_hw(self) -> Tuple[int, int]:
+        """Get the model input size as (height, width)."""
+        if isinstance(self.input_size, (list, tuple)):
+            return int(self.input_size[0]), int(self.input_size[1])
+        return int(self.input_size), int(self.input_size)
+    
+    def _graph_predict(self, batch: "torch.Tensor") -> Optional[List[Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+        """
+        Run a device batch through a CUDA graph captured for its shape.
+        
+        Replaying a graph launches the whole forward pass at once instead of
+        one kernel at a time. Graphs are captured on first use of each shape.
+        
+        Args:
+            batch: Normalized RGB BCHW tensor on the CUDA device
+            
+        Returns:
+            Per-image (xyxy, confidences, class_ids) host arrays, or None if
+            capture failed (graphs are then disabled)
+        """
         try:
-            start_time = time.time()
-            
-            # Get image from frame
-            image = frame.image
-            if image is None:
-                return []
-            
-            # Pre-process image for better detection
-            processed_image = self._preprocess_image(image)
-            
-            # Run inference with enhanced parameters
-            results = self.model(
-                processed_image,
-                conf=self.confidence_threshold,
-                iou=self.nms_threshold,
-                imgsz=self.input_size,
-                verbose=False,
-                save=False,
-                classes=self._get_class_indices() if self.classes_filter else None
-            )
+            key = tuple(batch.shape)
+            entry = self._cuda_graphs.get(key)
+            if entry is None:
+                entry = self._capture_graph(batch)
+                self._cuda_graphs[key] = entry
+            static_input, static_output, graph = entry
             
-            detections = []
-            
-            # Process results with enhanced filtering
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        detection = self._process_detection(box)
-                        if detection and self._is_valid_detection(detection):
-                            detections.append(detection)
-            
-            # Apply post-processing filters
-            detections = self._post_process_detections(detections)
-            
-            # Update statistics
-            self._update_stats(detections, time.time() - start_time)
-            
-            # Log performance
-            inference_time = time.time() - start_time
-            if len(detections) > 0:
-                logger.debug(
-                    f"Detected {len(detections)} objects in {inference_time:.3f}s "
-                    f"(camera: {frame.camera_id})"
-                )
+            static_input.copy_(batch)
+            graph.replay()
             
-            return detections
+            try:
+                from ultralytics.utils.nms import non_max_suppression
+            except ImportError:
+                from ultralytics.utils.ops import non_max_suppression
+            predictions = non_max_suppression(
+                static_output,
+                self.confidence_threshold,
+                self.nms_threshold,
+                classes=self._class_indices
+            )
+            
+            boxes = []
+            for prediction in predictions:
+                data = prediction.cpu().numpy()  # (N, 6) x1, y1, x2, y2, conf, cls
+                boxes.append((data[:, :4], data[:, 4], data[:, 5].astype(np.int32)))
+            return boxes
             
         except Exception as e:
-            logger.error(f"Error during detection: {e}")
-            return []
+            logger.warning(f"CUDA graph unavailable, using eager inference: {e}")
+            self.cuda_graph = False
+            self._cuda_graphs.clear()
+            return None
+    
+    def _capture_graph(self, batch: "torch.Tensor") -> Tuple:
+        """Capture the model forward pass for one input shape as a CUDA graph."""
+        # The predictor's AutoBackend handles fused layers and FP16 inputs
+        predictor = getattr(self.model, "predictor", None)
+        network = predictor.model if predictor is not None else self.model.model
+        static_input = batch.clone()
+        
+        # Warm up on a side stream so lazy initialization is not captured
+        side_stream = torch.cuda.Stream(device=batch.device)
+        side_stream.wait_stream(torch.cuda.current_stream(batch.device))
+        with torch.inference_mode(), torch.cuda.stream(side_stream):
+            for _ in range(3):
+                network(static_input)
+        torch.cuda.current_stream(batch.device).wait_stream(side_stream)
+        
+        graph = torch.cuda.CUDAGraph()
+        with torch.inference_mode(), torch.cuda.graph(graph):
+            static_output = network(static_input)
+        
+        logger.info(f"Captured CUDA graph for input shape {tuple(batch.shape)}")
+        return static_input, static_output, graph
     
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
-        """Pre-process image for better detection."""
+    def _result_boxes(self, result) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Get (xyxy, confidences, class_ids) host arrays from a YOLO result."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return None
+        
+        # A single device-to-host copy of the (N, 6) box tensor for the whole
+        # frame: x1, y1, x2, y2, confidence, class id
+        data = boxes.data.cpu().numpy()
+        return (
+            data[:, :4],
+            data[:, -2],
+            data[:, -1].astype(np.int32)
+        )
+    
+    def _result_to_detections(self, result, letterbox: Optional[Tuple[float, int, int]] = None,
+                              image_size: Optional[Tuple[int, int]] = None) -> DetectionBatch:
+        """Convert one YOLO result into filtered detections."""
+        return self._boxes_to_detections(self._result_boxes(result), letterbox, image_size)
+    
+    def _boxes_to_detections(self, boxes: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                             letterbox: Optional[Tuple[float, int, int]] = None,
+                             image_size: Optional[Tuple[int, int]] = None) -> DetectionBatch:
+        """
+        Convert raw boxes for one image into filtered detections.
+        
+        Args:
+            boxes: (xyxy, confidences, class_ids) host arrays, or None
+            letterbox: (scale, pad_x, pad_y) the image was letterboxed with
+                before inference, mapped back as (xyxy - pad) / scale
+            image_size: (height, width) of the original image, boxes are
+                clipped to it
+            
+        Returns:
+            Filtered detections
+        """
+        if boxes is None or len(boxes[1]) == 0:
+            return DetectionBatch.from_detections([])
+        
+        xyxy, confidences, class_ids = boxes
+        if letterbox is not None:
+            scale, pad_x, pad_y = letterbox
+            pad = np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)
+            xyxy = (xyxy - pad) / np.float32(scale)
+        if image_size is not None:
+            height, width = image_size
+            xyxy = np.clip(xyxy, 0, np.array([width, height, width, height], dtype=np.float32))
+        
+        # Class filtering happens inside the model's NMS (classes=)
+        class_names = np.array(
+            [self.COCO_CLASSES.get(cls, f"class_{cls}") for cls in class_ids.tolist()],
+            dtype=object
+        )
+        batch = DetectionBatch.from_arrays(xyxy, confidences, class_ids, class_names)
+        
+        # Process results with enhanced filtering
+        batch = batch.select(self._valid_mask(batch))
+        
+        # Apply post-processing filters
+        return self._post_process_detections(batch)
+    
+    def _preprocess_image(self, image: np.ndarray, slot: int = 0,
+                          out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Pre-process image for better detection.
+        
+        Args:
+            image: BGR image
+            slot: Output buffer index; images preprocessed for the same
+                batch must use distinct slots
+            out: Optional destination of the image's shape (may be the
+                image itself), used instead of the slot buffer
+            
+        Returns:
+            Preprocessed image (a reused buffer, valid until the slot is reused)
+        """
         try:
             # Apply histogram equalization for better contrast
-            if len(image.shape) == 3:
+            if len(image.shape) == 3 and self._needs_clahe(image):
+                buffers = self._get_preprocess_buffers(image.shape)
+                lab, l_in, l_out = buffers.lab, buffers.l_in, buffers.l_out
+                if out is not None and out.shape == image.shape:
+                    output = out
+                else:
+                    while len(buffers.outputs) <= slot:
+                        buffers.outputs.append(np.empty(image.shape, dtype=np.uint8))
+                    output = buffers.outputs[slot]
                 # Convert to LAB color space
-                lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+                cv2.cvtColor(image, cv2.COLOR_BGR2LAB, dst=lab)
                 # Apply CLAHE to L channel
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-                lab[:, :, 0] = clahe.apply(lab[:, :, 0])
+                cv2.extractChannel(lab, 0, dst=l_in)
+                buffers.clahe.apply(l_in, dst=l_out)
+                cv2.insertChannel(l_out, lab, 0)
                 # Convert back to BGR
-                image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+                image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=output)
             
             return image
             
@@ -281,152 +1221,236 @@ class ObjectDetector:
             logger.debug(f"Image preprocessing error: {e}")
             return image
     
-    def _process_detection(self, box) -> Optional[Detection]:
-        """Process individual detection box."""
-        try:
-            # Extract box data
-            xyxy = box.xyxy[0].cpu().numpy()  # [x1, y1, x2, y2]
-            conf = box.conf[0].cpu().numpy()  # confidence
-            cls = int(box.cls[0].cpu().numpy())  # class id
-            
-            # Get class name
-            class_name = self.COCO_CLASSES.get(cls, f"class_{cls}")
-            
-            # Filter by allowed classes
-            if self.classes_filter and class_name not in self.classes_filter:
-                return None
-            
-            # Calculate center point and area
-            x1, y1, x2, y2 = xyxy
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            area = (x2 - x1) * (y2 - y1)
-            
-            # Create detection object
-            detection = Detection(
-                bbox=(int(x1), int(y1), int(x2), int(y2)),
-                confidence=float(conf),
-                class_id=cls,
-                class_name=class_name,
-                center_point=(int(center_x), int(center_y)),
-                area=float(area)
-            )
-            
-            return detection
+    def _letterbox_geometry(self, source_height: int, source_width: int) -> Tuple[int, int, float, int, int]:
+        """
+        Fit an image into the model input size with one uniform scale.
+        
+        Args:
+            source_height: Image height
+            source_width: Image width
             
-        except Exception as e:
-            logger.debug(f"Detection processing error: {e}")
-            return None
+        Returns:
+            Tuple of (content height, content width, scale, pad_x, pad_y),
+            where the scaled image sits centered at (pad_x, pad_y) in the input
+        """
+        height, width = self._input_hw()
+        scale = min(height / source_height, width / source_width)
+        content_height = min(height, max(1, int(round(source_height * scale))))
+        content_width = min(width, max(1, int(round(source_width * scale))))
+        return (content_height, content_width, scale,
+                (width - content_width) // 2, (height - content_height) // 2)
     
-    def _is_valid_detection(self, detection: Detection) -> bool:
-        """Enhanced validation of detection quality."""
-        # Class-specific confidence threshold
-        if self.use_class_specific_thresholds:
-            min_conf = self.CLASS_CONFIDENCE_THRESHOLDS.get(detection.class_name, self.confidence_threshold)
-            if detection.confidence < min_conf:
-                return False
+    @staticmethod
+    def _fill_letterbox_border(target: np.ndarray, content_height: int, content_width: int,
+                               pad_x: int, pad_y: int):
+        """Fill the padding around the content of a letterboxed image with gray (114)."""
+        target[:pad_y] = 114
+        target[pad_y + content_height:] = 114
+        target[pad_y:pad_y + content_height, :pad_x] = 114
+        target[pad_y:pad_y + content_height, pad_x + content_width:] = 114
+    
+    def _resize_to_input(self, image: np.ndarray, slot: int = 0,
+                         out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Scale an image to fit the model input size, keeping its aspect ratio.
         
-        # Size filtering
-        if self.use_size_filtering:
-            size_filter = self.SIZE_FILTERS.get(detection.class_name)
-            if size_filter:
-                # Check area bounds
-                if (detection.area < size_filter["min_area"] or 
-                    detection.area > size_filter["max_area"]):
-                    return False
-                
-                # Check aspect ratio bounds
-                if (detection.aspect_ratio < size_filter["min_aspect"] or 
-                    detection.aspect_ratio > size_filter["max_aspect"]):
-                    return False
+        Args:
+            image: Source image
+            slot: Output buffer index, as for _preprocess_image
+            out: Optional contiguous destination of the scaled size, used
+                instead of the slot buffer
+            
+        Returns:
+            Scaled image (the input itself if already sized); padding to the
+            input size is left to the caller
+        """
+        height, width, _, _, _ = self._letterbox_geometry(*image.shape[:2])
+        if image.shape[:2] == (height, width):
+            return image
         
-        # Additional validation for specific classes
-        if detection.class_name == "person":
-            # Humans should have reasonable aspect ratio (taller than wide)
-            if detection.aspect_ratio > 1.5:  # Too wide for a person
-                return False
+        if out is not None and out.shape == (height, width) + image.shape[2:] and out.dtype == image.dtype:
+            cv2.resize(image, (width, height), dst=out, interpolation=cv2.INTER_LINEAR)
+            return out
         
-        elif detection.class_name in self.VEHICLE_CLASSES:
-            # Vehicles should typically be wider than tall
-            if detection.class_name in ["car", "truck", "bus"] and detection.aspect_ratio < 0.5:
-                return False
+        buffers = self._preprocess_buffers
+        if not hasattr(buffers, "resized"):
+            buffers.resized = []
+        while len(buffers.resized) <= slot:
+            buffers.resized.append(None)
         
-        return True
+        shape = (height, width) + image.shape[2:]
+        target = buffers.resized[slot]
+        if target is None or target.shape != shape or target.dtype != image.dtype:
+            target = np.empty(shape, dtype=image.dtype)
+            buffers.resized[slot] = target
+        
+        cv2.resize(image, (width, height), dst=target, interpolation=cv2.INTER_LINEAR)
+        return target
     
-    def _post_process_detections(self, detections: List[Detection]) -> List[Detection]:
-        """Apply post-processing filters to detections."""
-        if not detections:
-            return detections
+    def _needs_clahe(self, image: np.ndarray) -> bool:
+        """
+        Check whether a BGR image is low-contrast enough to benefit from CLAHE.
         
-        # Sort by confidence (highest first)
-        detections.sort(key=lambda d: d.confidence, reverse=True)
+        Measures the spread of the green channel (a cheap luma proxy) on a
+        ~64x64 strided sample, so the check costs a few thousand pixel reads.
+        """
+        if self.clahe_std_threshold is None:
+            return True
+        height, width = image.shape[:2]
+        sample = image[::max(1, height // 64), ::max(1, width // 64), 1]
+        return float(sample.std()) <= self.clahe_std_threshold
+    
+    def _preprocess_image_gpu(self, gpu_image) -> Optional[np.ndarray]:
+        """
+        Resize and pre-process a GPU-decoded frame with cv2.cuda.
         
-        # Remove overlapping detections of the same class
-        filtered_detections = []
-        for detection in detections:
-            is_duplicate = False
+        Args:
+            gpu_image: BGR GpuMat from the hardware decoder
             
-            for existing in filtered_detections:
-                if (existing.class_name == detection.class_name and 
-                    self._calculate_iou(detection.bbox, existing.bbox) > 0.5):
-                    is_duplicate = True
-                    break
+        Returns:
+            Preprocessed BGR image scaled to fit the model input size, or None if the
+            GPU path failed (it is then disabled in favour of the CPU path)
+        """
+        try:
+            buffers = self._preprocess_buffers
+            if not hasattr(buffers, "clahe_gpu"):
+                buffers.clahe_gpu = cv2.cuda.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            
+            source_width, source_height = gpu_image.size()
+            height, width, _, _, _ = self._letterbox_geometry(source_height, source_width)
+            resized = cv2.cuda.resize(gpu_image, (width, height), interpolation=cv2.INTER_LINEAR)
+            
+            thumbnail = cv2.cuda.resize(resized, (64, 64), interpolation=cv2.INTER_NEAREST)
+            if not self._needs_clahe(thumbnail.download()):
+                return resized.download()
             
-            if not is_duplicate:
-                filtered_detections.append(detection)
+            # Apply CLAHE to the L channel in LAB space, as on the CPU
+            lab = cv2.cuda.cvtColor(resized, cv2.COLOR_BGR2LAB)
+            channels = list(cv2.cuda.split(lab))
+            channels[0] = buffers.clahe_gpu.apply(channels[0], cv2.cuda.Stream_Null())
+            cv2.cuda.merge(channels, lab)
+            return cv2.cuda.cvtColor(lab, cv2.COLOR_LAB2BGR).download()
+            
+        except Exception as e:
+            logger.warning(f"GPU preprocessing unavailable, using CPU: {e}")
+            self._gpu_preprocess = False
+            return None
+    
+    def _get_preprocess_buffers(self, shape: Tuple[int, ...]):
+        """Get this thread's preprocessing buffers, reallocating on shape change."""
+        buffers = self._preprocess_buffers
+        if not hasattr(buffers, "clahe"):
+            buffers.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        if getattr(buffers, "shape", None) != shape:
+            height, width = shape[:2]
+            buffers.lab = np.empty(shape, dtype=np.uint8)
+            buffers.l_in = np.empty((height, width), dtype=np.uint8)
+            buffers.l_out = np.empty((height, width), dtype=np.uint8)
+            buffers.outputs = []
+            buffers.shape = shape
+        return buffers
+    
+    def _build_validation_tables(self):
+        """
+        Build per-class validation lookup tables indexed by class id.
+        
+        The last row holds the defaults used for class ids without specific
+        rules or outside the table.
+        """
+        size = max(80, max(self.COCO_CLASSES) + 1) + 1
+        self._min_conf_table = np.full(size, self.confidence_threshold, dtype=np.float64)
+        self._min_area_table = np.full(size, -np.inf)
+        self._max_area_table = np.full(size, np.inf)
+        self._min_aspect_table = np.full(size, -np.inf)
+        self._max_aspect_table = np.full(size, np.inf)
+        self._min_shape_table = np.full(size, -np.inf)
+        self._max_shape_table = np.full(size, np.inf)
         
-        return filtered_detections
+        for class_id, class_name in self.COCO_CLASSES.items():
+            self._min_conf_table[class_id] = self.CLASS_CONFIDENCE_THRESHOLDS.get(
+                class_name, self.confidence_threshold
+            )
+            
+            size_filter = self.SIZE_FILTERS.get(class_name)
+            if size_filter:
+                self._min_area_table[class_id] = size_filter["min_area"]
+                self._max_area_table[class_id] = size_filter["max_area"]
+                self._min_aspect_table[class_id] = size_filter["min_aspect"]
+                self._max_aspect_table[class_id] = size_filter["max_aspect"]
+            
+            if class_name == "person":
+                # Humans should have reasonable aspect ratio (taller than wide)
+                self._max_shape_table[class_id] = 1.5
+            elif class_name in ["car", "truck", "bus"]:
+                # Vehicles should typically be wider than tall
+                self._min_shape_table[class_id] = 0.5
     
-    def _calculate_iou(self, box1: Tuple, box2: Tuple) -> float:
-        """Calculate Intersection over Union of two bounding boxes."""
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
+    def _valid_mask(self, batch: DetectionBatch) -> np.ndarray:
+        """Enhanced validation of detection quality, one flag per detection."""
+        default_row = len(self._min_conf_table) - 1
+        class_ids = batch.class_ids
+        rows = np.where((class_ids >= 0) & (class_ids < default_row), class_ids, default_row)
+        
+        aspects = batch.aspect_ratios
+        
+        # Additional validation for specific classes
+        valid = (aspects >= self._min_shape_table[rows]) & (aspects <= self._max_shape_table[rows])
         
-        # Calculate intersection
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
+        # Class-specific confidence threshold
+        if self.use_class_specific_thresholds:
+            valid &= batch.confidences >= self._min_conf_table[rows]
         
-        if x2_i <= x1_i or y2_i <= y1_i:
-            return 0.0
+        # Size filtering: area and aspect ratio bounds
+        if self.use_size_filtering:
+            areas = batch.areas
+            valid &= (areas >= self._min_area_table[rows]) & (areas <= self._max_area_table[rows])
+            valid &= (aspects >= self._min_aspect_table[rows]) & (aspects <= self._max_aspect_table[rows])
+        
+        return valid
+    
+    def _post_process_detections(self, batch: DetectionBatch) -> DetectionBatch:
+        """Apply post-processing filters to detections."""
+        if not len(batch):
+            return batch
         
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
+        # Remove overlapping detections of the same class, highest confidence first
+        keep = _nms_per_class(batch.bboxes, batch.confidences.astype(np.float64), batch.class_ids, 0.5)
         
-        # Calculate union
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
+        return batch.select(keep)
+    
+    def set_classes_filter(self, classes_filter: Optional[List[str]]):
+        """
+        Set the class names to detect.
         
-        return intersection / union if union > 0 else 0.0
+        Args:
+            classes_filter: COCO class names to keep; empty or None keeps all
+        """
+        self.classes_filter = classes_filter
+        self._class_indices = self._get_class_indices() if classes_filter else None
     
     def _get_class_indices(self) -> List[int]:
         """Get class indices for filtering."""
-        indices = []
-        for class_name in self.classes_filter:
-            for idx, name in self.COCO_CLASSES.items():
-                if name == class_name:
-                    indices.append(idx)
-        return indices
+        return [
+            self.COCO_NAME_TO_ID[class_name] for class_name in self.classes_filter
+            if class_name in self.COCO_NAME_TO_ID
+        ]
     
-    def _update_stats(self, detections: List[Detection], processing_time: float):
+    def _update_stats(self, detections: DetectionBatch, processing_time: float):
         """Update detection statistics."""
         self.detection_stats["total_detections"] += len(detections)
-        self.detection_stats["processing_times"].append(processing_time)
         
-        # Keep only last 1000 processing times
-        if len(self.detection_stats["processing_times"]) > 1000:
-            self.detection_stats["processing_times"] = self.detection_stats["processing_times"][-1000:]
+        # Keep only last 1000 processing times, with a running sum for the average
+        processing_times = self.detection_stats["processing_times"]
+        if len(processing_times) == processing_times.maxlen:
+            self._processing_time_sum -= processing_times[0]
+        processing_times.append(processing_time)
+        self._processing_time_sum += processing_time
         
         # Update class counts
-        for detection in detections:
-            class_name = detection.class_name
-            if class_name not in self.detection_stats["class_counts"]:
-                self.detection_stats["class_counts"][class_name] = 0
-            self.detection_stats["class_counts"][class_name] += 1
+        self.detection_stats["class_counts"].update(detections.class_names.tolist())
     
     def detect_and_draw(self, frame, draw_confidence=True, draw_labels=True, 
-                       draw_center=False, draw_id=False) -> Optional[np.ndarray]:
+                       draw_center=False, draw_id=False, inplace=False) -> Optional[np.ndarray]:
         """
         Enhanced detect objects and draw bounding boxes on image.
         
@@ -436,87 +1460,148 @@ class ObjectDetector:
             draw_labels: Whether to draw class labels
             draw_center: Whether to draw center points
             draw_id: Whether to draw detection IDs
+            inplace: Draw on the frame's own image instead of a copy
             
         Returns:
             Image with drawn detections or None
         """
+        _, image = self.detect_and_draw_fused(
+            frame, draw_confidence, draw_labels, draw_center, draw_id, inplace
+        )
+        return image
+    
+    def detect_and_draw_fused(self, frame, draw_confidence=True, draw_labels=True,
+                              draw_center=False, draw_id=False,
+                              inplace=False) -> Tuple[DetectionBatch, Optional[np.ndarray]]:
+        """
+        Detect objects and draw them from a single inference pass.
+        
+        Use this instead of calling detect() and detect_and_draw() on the
+        same frame, which would run the model twice.
+        
+        Args:
+            frame: Frame object
+            draw_confidence: Whether to draw confidence scores
+            draw_labels: Whether to draw class labels
+            draw_center: Whether to draw center points
+            draw_id: Whether to draw detection IDs
+            inplace: Draw on the frame's own image instead of a copy
+            
+        Returns:
+            Tuple of (detections, image with drawn detections)
+        """
         detections = self.detect(frame)
+        image = self.draw_detections(
+            frame, detections, draw_confidence, draw_labels, draw_center, draw_id, inplace
+        )
+        return detections, image
+    
+    def draw_detections(self, frame, detections, draw_confidence=True, draw_labels=True,
+                        draw_center=False, draw_id=False, inplace=False) -> Optional[np.ndarray]:
+        """
+        Draw already computed detections on the frame image.
         
-        if not detections:
-            return frame.image.copy()
-        
-        image = frame.image.copy()
-        
-        # Enhanced colors for different classes
-        colors = {
-            "person": (0, 255, 0),      # Green
-            "car": (255, 0, 0),         # Blue  
-            "truck": (255, 0, 255),     # Magenta
-            "motorcycle": (0, 255, 255), # Yellow
-            "bicycle": (255, 255, 0),   # Cyan
-            "bus": (128, 0, 128),       # Purple
-            "dog": (255, 165, 0),       # Orange
-            "cat": (255, 192, 203),     # Pink
-            "bird": (173, 216, 230),    # Light Blue
-        }
+        Args:
+            frame: Frame object
+            detections: Detections to draw (DetectionBatch or list)
+            draw_confidence: Whether to draw confidence scores
+            draw_labels: Whether to draw class labels
+            draw_center: Whether to draw center points
+            draw_id: Whether to draw detection IDs
+            inplace: Draw on the frame's own image instead of a copy
+            
+        Returns:
+            Image with drawn detections or None
+        """
+        image = frame.to_cpu()
+        if image is None:
+            return None
+        if not inplace:
+            image = image.copy()
+        batch = self._as_batch(detections)
+        if not len(batch):
+            return image
         
-        for i, detection in enumerate(detections):
-            x1, y1, x2, y2 = detection.bbox
-            color = colors.get(detection.class_name, (128, 128, 128))  # Default gray
-            
-            # Draw bounding box with thickness based on confidence
-            thickness = max(1, int(detection.confidence * 3))
-            cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
-            
-            # Draw center point
-            if draw_center:
-                cv2.circle(image, detection.center_point, 3, color, -1)
-            
-            # Prepare label components
-            label_parts = []
-            if draw_labels:
-                label_parts.append(detection.class_name)
-            if draw_confidence:
-                label_parts.append(f"{detection.confidence:.2f}")
-            if draw_id:
-                label_parts.append(f"#{i}")
-            
-            if label_parts:
-                label = " ".join(label_parts)
-                
-                # Calculate label size
-                (label_w, label_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                
-                # Draw label background
-                cv2.rectangle(image, (x1, y1 - label_h - 10), (x1 + label_w, y1), color, -1)
+        # Color table row per detection
+        default_row = len(self._color_lut) - 1
+        class_ids = batch.class_ids
+        color_rows = np.where((class_ids >= 0) & (class_ids < default_row), class_ids, default_row)
+        
+        # Draw bounding boxes with thickness based on confidence, one
+        # polylines call per (color, thickness), in order of first appearance
+        thicknesses = np.maximum(1, (batch.confidences.astype(np.float64) * 3).astype(np.int64))
+        keys = self._color_ids[color_rows].astype(np.int64) << 32 | thicknesses
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        x1, y1, x2, y2 = batch.bboxes.T
+        corners = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1).reshape(-1, 4, 2)
+        for group in np.argsort(first).tolist():
+            rows = np.flatnonzero(inverse.ravel() == group)
+            cv2.polylines(
+                image, list(corners[rows]), True,
+                self._color_tuples[color_rows[rows[0]]], int(thicknesses[rows[0]])
+            )
+        
+        colors = [self._color_tuples[row] for row in color_rows.tolist()]
+        confidences = batch.confidences.tolist()
+        
+        # Draw center points
+        if draw_center:
+            for center, color in zip(batch.centers.tolist(), colors):
+                cv2.circle(image, tuple(center), 3, color, -1)
+        
+        if draw_labels or draw_confidence or draw_id:
+            class_names = batch.class_names.tolist()
+            for i, (x, y) in enumerate(batch.bboxes[:, :2].tolist()):
+                # Prepare label components
+                label_parts = []
+                if draw_labels:
+                    label_parts.append(class_names[i])
+                if draw_confidence:
+                    label_parts.append(f"{confidences[i]:.2f}")
+                if draw_id:
+                    label_parts.append(f"#{i}")
                 
-                # Draw label text
-                cv2.putText(image, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+                # Draw label background and text from the cached bitmap
+                _blit_label(image, _render_label(" ".join(label_parts), colors[i]), x, y)
         
         return image
     
-    def get_detections_by_class(self, detections: List[Detection], class_name: str) -> List[Detection]:
+    @staticmethod
+    def _as_batch(detections) -> DetectionBatch:
+        """Accept either a DetectionBatch or a plain list of Detection objects."""
+        if isinstance(detections, DetectionBatch):
+            return detections
+        return DetectionBatch.from_detections(detections)
+    
+    def get_detections_by_class(self, detections, class_name: str) -> DetectionBatch:
         """Get detections filtered by class name."""
-        return [d for d in detections if d.class_name == class_name]
+        batch = self._as_batch(detections)
+        class_id = self.COCO_NAME_TO_ID.get(class_name)
+        if class_id is None:
+            return batch.select(batch.class_names == class_name)
+        return batch.select(batch.class_ids == class_id)
     
-    def get_human_detections(self, detections: List[Detection]) -> List[Detection]:
+    def get_human_detections(self, detections) -> DetectionBatch:
         """Get only human detections."""
-        return [d for d in detections if d.class_name in self.HUMAN_CLASSES]
+        batch = self._as_batch(detections)
+        return batch.select(np.isin(batch.class_ids, self.HUMAN_CLASS_IDS))
     
-    def get_vehicle_detections(self, detections: List[Detection]) -> List[Detection]:
+    def get_vehicle_detections(self, detections) -> DetectionBatch:
         """Get only vehicle detections."""
-        return [d for d in detections if d.class_name in self.VEHICLE_CLASSES]
+        batch = self._as_batch(detections)
+        return batch.select(np.isin(batch.class_ids, self.VEHICLE_CLASS_IDS))
     
-    def get_animal_detections(self, detections: List[Detection]) -> List[Detection]:
+    def get_animal_detections(self, detections) -> DetectionBatch:
         """Get only animal detections."""
-        return [d for d in detections if d.class_name in self.ANIMAL_CLASSES]
+        batch = self._as_batch(detections)
+        return batch.select(np.isin(batch.class_ids, self.ANIMAL_CLASS_IDS))
     
     def get_detection_stats(self) -> Dict:
         """Get detection performance statistics."""
         stats = self.detection_stats.copy()
         
         if stats["processing_times"]:
-            stats["avg_processing_time"] = np.mean(stats["processing_times"])
+            stats["avg_processing_time"] = self._processing_time_sum / len(stats["processing_times"])
             stats["fps"] = 1.0 / stats["avg_processing_time"] if stats["avg_processing_time"] > 0 else 0
         else:
             stats["avg_processing_time"] = 0
@@ -529,9 +1614,10 @@ class ObjectDetector:
         self.detection_stats = {
             "total_detections": 0,
             "filtered_detections": 0,
-            "processing_times": [],
-            "class_counts": {}
+            "processing_times": deque(maxlen=1000),
+            "class_counts": Counter()
         }
+        self._processing_time_sum = 0.0
     
     def set_confidence_threshold(self, threshold: float, class_name: str = None):
         """
@@ -547,6 +1633,8 @@ class ObjectDetector:
         else:
             self.confidence_threshold = threshold
             logger.info(f"Set global confidence threshold: {threshold}")
+        
+        self._build_validation_tables()
     
     def stop(self):
         """Stop detector and cleanup resources."""
@@ -559,7 +1647,9 @@ class ObjectDetector:
         logger.info(f"Class distribution: {stats['class_counts']}")
         
         if self.model is not None:
-            # Clear CUDA cache if using GPU
+            # Clear CUDA cache if using GPU. This synchronizes the device and
+            # sweeps the allocator, so it belongs here at shutdown only, never
+            # on per-frame or error paths; scratch memory is reused instead
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
         
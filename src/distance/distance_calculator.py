@@ -1,11 +1,51 @@
 """Distance calculator module - Calibration-based implementation."""
-import math
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 from loguru import logger
 
 
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Ray-casting containment test for many points against one polygon.
+    
+    Same edge rules as DistanceCalculator._point_in_polygon, evaluated for
+    all points and edges at once.
+    
+    Args:
+        points: (K, 2) array of x, y coordinates
+        polygon: (V, 2) array of polygon vertices
+        
+    Returns:
+        (K,) boolean array, True where the point is inside the polygon
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    
+    # Edges (p1 -> p2) as (1, V) rows against (K, 1) point columns
+    p1 = polygon
+    p2 = np.roll(polygon, -1, axis=0)
+    p1x, p1y = p1[None, :, 0], p1[None, :, 1]
+    p2x, p2y = p2[None, :, 0], p2[None, :, 1]
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    
+    crosses = (
+        (y > np.minimum(p1y, p2y)) &
+        (y <= np.maximum(p1y, p2y)) &
+        (x <= np.maximum(p1x, p2x))
+    )
+    
+    # Horizontal edges never pass the y test above, so the guarded division
+    # only matters for masked-out entries
+    dy = p2y - p1y
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xinters = (y - p1y) * (p2x - p1x) / np.where(dy == 0, 1.0, dy) + p1x
+    crosses &= (p1x == p2x) | (x <= xinters)
+    
+    return (np.count_nonzero(crosses, axis=1) % 2).astype(bool)
+
+
 @dataclass
 class ReferencePoint:
     """Reference point for distance calculation."""
@@ -47,10 +87,26 @@ class CameraCalibration:
             )
             self.reference_points.append(point)
         
+        # Reference points as arrays (first point wins for duplicate names)
+        self._ref_idx: Dict[str, int] = {}
+        for i, point in enumerate(self.reference_points):
+            self._ref_idx.setdefault(point.name, i)
+        self._ref_xy = np.array(
+            [point.position for point in self.reference_points], dtype=np.float64
+        ).reshape(-1, 2)
+        self._ref_d = np.array(
+            [point.real_distance for point in self.reference_points], dtype=np.float64
+        )
+        
         # Camera parameters (can be expanded for more sophisticated calibration)
         self.focal_length = None
         self.sensor_height = None
+        
+        # Image size: configured resolution until frames report the real one
+        self.image_width = None
         self.image_height = None
+        width, height = camera_config.get('resolution') or (1920, 1080)
+        self.set_image_size(width, height)
         
         # Calculate calibration if we have enough reference points
         if len(self.reference_points) >= 1:
@@ -71,7 +127,6 @@ class CameraCalibration:
         
         # Assume standard camera parameters if not specified
         # These would ideally come from camera calibration
-        self.image_height = 1080  # Standard height, should come from actual image
         self.sensor_height = 5.76e-3  # Standard sensor size in meters (can vary)
         
         # Calculate focal length using the reference point
@@ -88,6 +143,26 @@ class CameraCalibration:
         
         logger.debug(f"Calculated focal length: {self.focal_length:.2f} pixels")
     
+    def set_image_size(self, width: int, height: int):
+        """
+        Set the camera image size and the edge bounds used for confidence.
+        
+        Args:
+            width: Image width in pixels
+            height: Image height in pixels
+        """
+        if (width, height) == (self.image_width, self.image_height):
+            return
+        
+        self.image_width, self.image_height = width, height
+        
+        # Objects outside these bounds (10% margin) are near the image edge
+        edge_margin = 0.1
+        self.edge_bounds = (
+            width * edge_margin, width * (1 - edge_margin),
+            height * edge_margin, height * (1 - edge_margin)
+        )
+    
     def calculate_distance_to_camera(self, object_position: Tuple[int, int], 
                                    object_height_pixels: int) -> float:
         """
@@ -137,40 +212,43 @@ class CameraCalibration:
         Returns:
             Distance in meters
         """
-        ref_point = self.get_reference_point(reference_name)
-        if not ref_point:
+        index = self._ref_idx.get(reference_name)
+        if index is None:
             return float('inf')
         
         try:
-            # Calculate pixel distance
-            pixel_distance = math.sqrt(
-                (object_position[0] - ref_point.position[0]) ** 2 +
-                (object_position[1] - ref_point.position[1]) ** 2
-            )
-            
-            # Convert pixel distance to real distance
-            # This is a simplified approach using the reference point's known distance
-            # More sophisticated methods would use proper camera calibration
-            
-            if pixel_distance == 0:
-                return 0.0
-            
-            # Use proportional scaling based on the reference point
-            # This assumes the reference point and object are roughly at the same depth
-            real_distance = (pixel_distance * ref_point.real_distance) / 1000.0  # Rough conversion
-            
-            return real_distance
+            distances = self.distances_to_refs(np.array([object_position], dtype=np.float64))
+            return float(distances[0, index])
             
         except Exception as e:
             logger.warning(f"Error calculating distance to reference {reference_name}: {e}")
             return float('inf')
     
+    def distances_to_refs(self, points: np.ndarray) -> np.ndarray:
+        """
+        Calculate distances from many objects to every reference point.
+        
+        Args:
+            points: (K, 2) array of object (x, y) pixel coordinates
+            
+        Returns:
+            (K, R) array of distances in meters, columns in reference_points order
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        diff = points[:, None, :] - self._ref_xy[None, :, :]
+        pixel_distance = np.sqrt(diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1])
+        
+        # Convert pixel distance to real distance
+        # This is a simplified approach using the reference point's known distance
+        # More sophisticated methods would use proper camera calibration
+        # Use proportional scaling based on the reference point
+        # This assumes the reference point and object are roughly at the same depth
+        return (pixel_distance * self._ref_d) / 1000.0  # Rough conversion
+    
     def get_reference_point(self, name: str) -> Optional[ReferencePoint]:
         """Get reference point by name."""
-        for ref in self.reference_points:
-            if ref.name == name:
-                return ref
-        return None
+        index = self._ref_idx.get(name)
+        return self.reference_points[index] if index is not None else None
 
 
 class DistanceCalculator:
@@ -186,12 +264,22 @@ class DistanceCalculator:
         # Camera calibrations
         self.calibrations: Dict[str, CameraCalibration] = {}
         
+        # Zone polygons as arrays, keyed by their vertex coordinates
+        self._zone_polygons: Dict[Tuple, np.ndarray] = {}
+        
         # Load camera calibrations
         cameras = config.get("cameras", [])
         for camera_config in cameras:
             camera_id = camera_config.get('id')
             if camera_id:
                 self.calibrations[camera_id] = CameraCalibration(camera_config)
+            
+            # Prepare zone polygons before the first frame
+            for zone_config in camera_config.get('zones', []) or []:
+                try:
+                    self._zone_polygon(zone_config)
+                except Exception as e:
+                    logger.warning(f"Invalid zone polygon on camera {camera_id}: {e}")
         
         logger.info(f"Distance calculator initialized with method: {self.method}")
         logger.info(f"Loaded calibrations for {len(self.calibrations)} cameras")
@@ -227,12 +315,12 @@ class DistanceCalculator:
             )
             
             # Calculate distances to all reference points
-            distance_to_references = {}
-            for ref_point in calibration.reference_points:
-                distance = calibration.calculate_distance_to_reference(
-                    track.center_point, ref_point.name
-                )
-                distance_to_references[ref_point.name] = distance
+            distances = calibration.distances_to_refs(
+                np.array([track.center_point], dtype=np.float64)
+            )[0].tolist()
+            distance_to_references = {
+                name: distances[index] for name, index in calibration._ref_idx.items()
+            }
             
             # Calculate confidence based on object size and position
             confidence = self._calculate_confidence(track, calibration)
@@ -245,7 +333,7 @@ class DistanceCalculator:
                 "unit": self.unit
             }
             
-            logger.debug(f"Distance calculated for track {track.track_id}: {distance_to_camera:.2f}m")
+            logger.debug("Distance calculated for track {}: {:.2f}m", track.track_id, distance_to_camera)
             
             return result
             
@@ -257,6 +345,110 @@ class DistanceCalculator:
                 "confidence": 0.0
             }
     
+    def calculate_batch(self, tracks: List, camera_id: str) -> List[Dict[str, Any]]:
+        """
+        Calculate distances for all tracked objects of one frame at once.
+        
+        Args:
+            tracks: Track objects with position and bbox information
+            camera_id: Camera identifier
+            
+        Returns:
+            Distance measurement dictionaries, one per track in order
+        """
+        if not tracks:
+            return []
+        
+        calibration = self.calibrations.get(camera_id)
+        if not calibration:
+            logger.warning(f"No calibration found for camera {camera_id}")
+            return [
+                {"distance_to_camera": 0.0, "distance_to_reference": {}, "confidence": 0.0}
+                for _ in tracks
+            ]
+        
+        try:
+            bboxes = np.array([track.bbox for track in tracks], dtype=np.float64).reshape(-1, 4)
+            centers = np.array([track.center_point for track in tracks], dtype=np.float64).reshape(-1, 2)
+            areas = np.array([track.area for track in tracks], dtype=np.float64)
+            track_confidences = np.array([track.confidence for track in tracks], dtype=np.float64)
+            
+            # Distance to camera from object height (see calculate_distance_to_camera)
+            heights = bboxes[:, 3] - bboxes[:, 1]
+            if calibration.focal_length and calibration.reference_points:
+                estimated_real_height = 1.7  # Average human height in meters
+                with np.errstate(divide='ignore'):
+                    distances_to_camera = np.clip(
+                        (estimated_real_height * calibration.focal_length) / heights, 0.5, 100.0
+                    )
+                distances_to_camera[heights <= 0] = 0.0
+            else:
+                distances_to_camera = np.zeros(len(tracks))
+            
+            # Distances to all reference points
+            reference_distances = calibration.distances_to_refs(centers).tolist()
+            ref_idx = calibration._ref_idx
+            
+            confidences = self._calculate_confidences(
+                centers, areas, track_confidences, calibration.edge_bounds
+            )
+            
+            results = [
+                {
+                    "distance_to_camera": distance_to_camera,
+                    "distance_to_reference": {
+                        name: distances[index] for name, index in ref_idx.items()
+                    },
+                    "confidence": confidence,
+                    "method": self.method,
+                    "unit": self.unit
+                }
+                for distance_to_camera, distances, confidence in zip(
+                    distances_to_camera.tolist(), reference_distances, confidences.tolist()
+                )
+            ]
+            
+            logger.debug("Distances calculated for {} tracks on camera {}", len(tracks), camera_id)
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error calculating batch distances for camera {camera_id}: {e}")
+            return [self.calculate(track, camera_id) for track in tracks]
+    
+    def _calculate_confidences(self, centers: np.ndarray, areas: np.ndarray,
+                               track_confidences: np.ndarray,
+                               edge_bounds: Tuple[float, float, float, float]) -> np.ndarray:
+        """
+        Vectorized _calculate_confidence for many tracks.
+        
+        Args:
+            centers: (K, 2) track center points
+            areas: (K,) track areas
+            track_confidences: (K,) detection confidences
+            edge_bounds: (x_low, x_high, y_low, y_high) of the camera image
+            
+        Returns:
+            (K,) confidence scores (0.0 to 1.0)
+        """
+        confidences = np.ones(len(areas))
+        
+        # Reduce confidence based on object size
+        confidences[areas < 1000] *= 0.5
+        confidences[areas > 50000] *= 0.7
+        
+        # Reduce confidence based on position (objects at edges are less reliable)
+        x_low, x_high, y_low, y_high = edge_bounds
+        x, y = centers[:, 0], centers[:, 1]
+        inside = (x >= x_low) & (x <= x_high) & (y >= y_low) & (y <= y_high)
+        confidences[~inside] *= 0.8
+        
+        # Reduce confidence based on detection confidence
+        confidences *= track_confidences
+        
+        # Ensure confidence is between 0 and 1
+        return np.clip(confidences, 0.0, 1.0)
+    
     def _calculate_confidence(self, track, calibration: CameraCalibration) -> float:
         """
         Calculate confidence score for distance measurement.
@@ -279,12 +471,8 @@ class DistanceCalculator:
         
         # Reduce confidence based on position (objects at edges are less reliable)
         x, y = track.center_point
-        # Assume image dimensions (should come from actual image)
-        image_width, image_height = 1920, 1080
-        
-        edge_margin = 0.1  # 10% margin
-        if (x < image_width * edge_margin or x > image_width * (1 - edge_margin) or
-            y < image_height * edge_margin or y > image_height * (1 - edge_margin)):
+        x_low, x_high, y_low, y_high = calibration.edge_bounds
+        if not (x_low <= x <= x_high and y_low <= y <= y_high):
             confidence *= 0.8
         
         # Reduce confidence based on detection confidence
@@ -293,6 +481,19 @@ class DistanceCalculator:
         # Ensure confidence is between 0 and 1
         return max(0.0, min(1.0, confidence))
     
+    def set_image_size(self, camera_id: str, width: int, height: int):
+        """
+        Update a camera's image size from its frames.
+        
+        Args:
+            camera_id: Camera identifier
+            width: Frame width in pixels
+            height: Frame height in pixels
+        """
+        calibration = self.calibrations.get(camera_id)
+        if calibration:
+            calibration.set_image_size(width, height)
+    
     def get_nearby_objects(self, tracks: List, reference_name: str, 
                           max_distance: float, camera_id: str) -> List:
         """
@@ -335,18 +536,54 @@ class DistanceCalculator:
         """
         try:
             # Get zone polygon
-            polygon_points = zone_config.get('polygon', [])
-            if len(polygon_points) < 3:
+            polygon = self._zone_polygon(zone_config)
+            if len(polygon) < 3:
                 return False
             
             # Check if track center point is inside polygon
             x, y = track.center_point
-            return self._point_in_polygon(x, y, polygon_points)
+            return bool(points_in_polygon(np.array([[x, y]], dtype=np.float64), polygon)[0])
             
         except Exception as e:
             logger.warning(f"Error checking zone containment: {e}")
             return False
     
+    def are_objects_in_zone(self, tracks: List, zone_config: Dict, camera_id: str) -> np.ndarray:
+        """
+        Check which objects are within a defined zone.
+        
+        Args:
+            tracks: List of Track objects
+            zone_config: Zone configuration with polygon definition
+            camera_id: Camera identifier
+            
+        Returns:
+            Boolean array, True for each track whose center is in the zone
+        """
+        try:
+            # Get zone polygon
+            polygon = self._zone_polygon(zone_config)
+            if len(polygon) < 3 or not tracks:
+                return np.zeros(len(tracks), dtype=bool)
+            
+            # Check if track center points are inside polygon
+            centers = np.array([track.center_point for track in tracks], dtype=np.float64)
+            return points_in_polygon(centers, polygon)
+            
+        except Exception as e:
+            logger.warning(f"Error checking zone containment: {e}")
+            return np.zeros(len(tracks), dtype=bool)
+    
+    def _zone_polygon(self, zone_config: Dict) -> np.ndarray:
+        """Get a zone's polygon as a cached (V, 2) array."""
+        polygon_points = zone_config.get('polygon', [])
+        key = tuple(tuple(point) for point in polygon_points)
+        polygon = self._zone_polygons.get(key)
+        if polygon is None:
+            polygon = np.asarray(polygon_points, dtype=np.float64).reshape(-1, 2)
+            self._zone_polygons[key] = polygon
+        return polygon
+    
     def _point_in_polygon(self, x: int, y: int, polygon: List[List[int]]) -> bool:
         """
         Check if point is inside polygon using ray casting algorithm.
@@ -379,3 +616,4 @@ class DistanceCalculator:
         """Stop calculator and cleanup resources."""
         logger.info("Stopping distance calculator")
         self.calibrations.clear()
+        self._zone_polygons.clear()
@@ -1,22 +1,17 @@
 """
 Main application entry point for the Smart CCTV System.
 """
+import queue
 import signal
 import sys
+import threading
 import time
 from pathlib import Path
-from typing import List
 import argparse
 
 from loguru import logger
 
-from capture.camera_manager import CameraManager
-from detection.object_detector import ObjectDetector
-from tracking.object_tracker import ObjectTracker
-from distance.distance_calculator import DistanceCalculator
-from alerts.alert_manager import AlertManager
 from utils.config_loader import ConfigLoader
-from utils.database import Database
 
 
 class SmartCCTVSystem:
@@ -31,6 +26,15 @@ class SmartCCTVSystem:
         """
         logger.info("Initializing Smart CCTV System...")
         
+        # Pipeline modules pull in OpenCV, PyTorch and Ultralytics; import
+        # them here so --help/--version don't pay that startup cost
+        from capture.camera_manager import CameraManager
+        from detection.object_detector import ObjectDetector
+        from tracking.object_tracker import ObjectTracker
+        from distance.distance_calculator import DistanceCalculator
+        from alerts.alert_manager import AlertManager
+        from utils.database import Database
+        
         # Load configuration
         self.config = ConfigLoader(config_path)
         
@@ -55,6 +59,22 @@ class SmartCCTVSystem:
         self.frame_count = 0
         self.start_time = None
         
+        # Pipeline: a capture thread feeds frame batches to the processing
+        # loop, which hands detection events to a database writer thread.
+        # Bounded queues keep the stages from running away from each other
+        self._frame_queue: queue.Queue = queue.Queue(
+            maxsize=max(1, int(self.config.get("performance.pipeline_queue_size", 2)))
+        )
+        self._event_queue: queue.Queue = queue.Queue(maxsize=1000)
+        self._capture_thread = None
+        self._event_writer_thread = None
+        # Set once the processing loop has returned, so stop() never tears
+        # components down under a frame that is still being processed
+        self._processing_done = threading.Event()
+        self._stopped = False
+        self.dropped_frame_batches = 0
+        self.dropped_events = 0
+        
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -108,15 +128,92 @@ class SmartCCTVSystem:
             self.camera_manager.start()
             logger.info(f"Started {len(self.camera_manager.cameras)} cameras")
             
-            # Main processing loop
+            # Start pipeline stages around the processing loop
+            self._capture_thread = threading.Thread(
+                target=self._capture_loop, name="frame-capture", daemon=True
+            )
+            self._event_writer_thread = threading.Thread(
+                target=self._event_writer_loop, name="event-writer", daemon=True
+            )
+            self._capture_thread.start()
+            self._event_writer_thread.start()
+            
+            # Main processing loop, until stop is requested
             self._main_loop()
             
         except Exception as e:
             logger.exception(f"Fatal error in main loop: {e}")
+        finally:
+            self._processing_done.set()
             self.stop()
     
+    def _capture_loop(self):
+        """
+        Pipeline stage 1: collect frame batches from the cameras.
+        
+        Runs ahead of processing; when processing falls behind, the oldest
+        queued batch is dropped so the loop always works on recent frames.
+        """
+        while self.running:
+            try:
+                # Get frames from all cameras, waiting briefly for one to arrive
+                frames = self.camera_manager.get_frames(timeout=0.1)
+                if not frames:
+                    continue
+                
+                while True:
+                    try:
+                        self._frame_queue.put_nowait(frames)
+                        break
+                    except queue.Full:
+                        try:
+                            self._frame_queue.get_nowait()
+                            self.dropped_frame_batches += 1
+                        except queue.Empty:
+                            pass
+                        
+            except Exception as e:
+                logger.error(f"Error in frame capture: {e}")
+                time.sleep(0.1)
+    
+    def _event_writer_loop(self):
+        """Pipeline stage 3: write queued detection events to the database."""
+        stopping = False
+        while not stopping:
+            try:
+                events = self._event_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            # Drain whatever else is queued into the same write
+            batch = []
+            while True:
+                if events is None:
+                    stopping = True
+                else:
+                    batch.extend(events)
+                try:
+                    events = self._event_queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write_events(batch)
+    
+    def _write_events(self, events):
+        """Write detection events, in one transaction when supported."""
+        try:
+            insert_many = getattr(self.db, "insert_events_many", None)
+            if insert_many:
+                insert_many(events)
+            else:
+                for event_data in events:
+                    self.db.insert_event(event_data)
+        except Exception as e:
+            logger.error(f"Database logging error ({len(events)} events): {e}")
+    
     def _main_loop(self):
-        """Main processing loop."""
+        """Main processing loop (pipeline stage 2)."""
         logger.info("Entering main processing loop")
         fps_limit = self.config.get("performance.fps_limit", 15)
         frame_time = 1.0 / fps_limit if fps_limit > 0 else 0
@@ -125,16 +222,17 @@ class SmartCCTVSystem:
             loop_start = time.time()
             
             try:
-                # Get frames from all cameras
-                frames = self.camera_manager.get_frames()
-                
-                if not frames:
-                    time.sleep(0.1)
+                # Take the next batch of frames from the capture stage
+                try:
+                    frames = self._frame_queue.get(timeout=0.1)
+                except queue.Empty:
                     continue
                 
-                # Process each frame
-                for frame in frames:
-                    self._process_frame(frame)
+                # Detect on every camera's frame in one batched call, then
+                # run tracking and alerts per frame
+                all_detections = self.detector.detect_batch(frames)
+                for frame, detections in zip(frames, all_detections):
+                    self._process_frame(frame, detections)
                     self.frame_count += 1
                 
                 # Log stats periodically
@@ -150,34 +248,38 @@ class SmartCCTVSystem:
                 logger.error(f"Error in main loop iteration: {e}")
                 time.sleep(0.1)
     
-    def _process_frame(self, frame):
+    def _process_frame(self, frame, detections=None):
         """
         Process a single frame through the pipeline.
         
         Args:
             frame: Frame object from camera
+            detections: Detections for the frame when already computed by a
+                batched detector call; detected here otherwise
         """
         try:
             # Step 1: Object detection
-            detections = self.detector.detect(frame)
-            
-            logger.info(f"Detected {len(detections)} objects in frame from {frame.camera_id}")
-            logger.info(f"Detected {detections} objects in frame from {frame.camera_id}")
+            if detections is None:
+                detections = self.detector.detect(frame)
             
-            if not detections:
-                return
+            logger.info("Detected {} objects in frame from {}", len(detections), frame.camera_id)
+            # The full detection list is only built into a string when debug
+            # output is enabled
+            logger.debug("Detections from {}: {}", frame.camera_id, detections)
             
-            # Step 2: Object tracking
+            # Step 2: Object tracking, also on frames without detections so
+            # existing tracks age and coast
             tracks = self.tracker.update(detections, frame.camera_id)
             
             if not tracks:
                 return
             
             # Step 3: Distance calculation (for persons only)
-            for track in tracks:
-                if track.class_name == "person":
-                    distance_info = self.distance_calc.calculate(track, frame.camera_id)
-                    track.distance_info = distance_info
+            self.distance_calc.set_image_size(frame.camera_id, *frame.resolution)
+            persons = [track for track in tracks if track.class_name == "person"]
+            distance_infos = self.distance_calc.calculate_batch(persons, frame.camera_id)
+            for track, distance_info in zip(persons, distance_infos):
+                track.distance_info = distance_info
             
             # Step 4: Alert evaluation
             self.alert_manager.evaluate(tracks, frame)
@@ -189,20 +291,29 @@ class SmartCCTVSystem:
             logger.error(f"Error processing frame from {frame.camera_id}: {e}")
     
     def _log_events(self, tracks, frame):
-        """Log detection events to database."""
-        for track in tracks:
-            if track.is_confirmed:
-                event_data = {
-                    "timestamp": frame.timestamp,
-                    "camera_id": frame.camera_id,
-                    "event_type": "detection",
-                    "track_id": track.track_id,
-                    "class_name": track.class_name,
-                    "distance": getattr(track, 'distance_info', {}).get('distance_to_camera', None),
-                    "alert_triggered": 0,
-                    "metadata": {}
-                }
-                self.db.insert_event(event_data)
+        """Log detection events to database, one batch per frame."""
+        events = [
+            {
+                "timestamp": frame.timestamp,
+                "camera_id": frame.camera_id,
+                "event_type": "detection",
+                "track_id": track.track_id,
+                "class_name": track.class_name,
+                "distance": track.distance_info.get('distance_to_camera') if track.distance_info else None,
+                "alert_triggered": 0,
+                "metadata": {}
+            }
+            for track in tracks if track.is_confirmed
+        ]
+        if not events:
+            return
+        
+        # Written by the event writer thread, off the processing path
+        try:
+            self._event_queue.put_nowait(events)
+        except queue.Full:
+            self.dropped_events += len(events)
+            logger.warning(f"Event queue full, dropped {len(events)} events")
     
     def _log_stats(self):
         """Log system statistics."""
@@ -211,23 +322,34 @@ class SmartCCTVSystem:
         
         logger.info(
             f"Stats: Frames={self.frame_count}, FPS={fps:.2f}, "
-            f"Uptime={uptime:.0f}s, Cameras={self.camera_manager.active_count()}"
+            f"Uptime={uptime:.0f}s, Cameras={self.camera_manager.active_count()}, "
+            f"Dropped batches={self.dropped_frame_batches}"
         )
     
     def _signal_handler(self, sig, frame):
         """Handle shutdown signals gracefully."""
         logger.warning(f"Received signal {sig}, shutting down...")
-        self.stop()
+        # The processing loop exits after its current frame batch and start()
+        # then shuts down; stopping here could pull components out from under
+        # that batch
+        self.running = False
     
     def stop(self):
         """Stop the system gracefully."""
-        if not self.running:
+        if self._stopped:
             return
+        self._stopped = True
         
         logger.info("Stopping Smart CCTV System...")
         self.running = False
         
         try:
+            # Let the pipeline threads finish their current work first
+            if self._capture_thread is not None:
+                self._capture_thread.join(timeout=2)
+            if self.start_time is not None and not self._processing_done.wait(timeout=5):
+                logger.warning("Processing loop did not finish in time")
+            
             # Stop components in reverse order
             self.alert_manager.stop()
             self.distance_calc.stop()
@@ -235,12 +357,22 @@ class SmartCCTVSystem:
             self.detector.stop()
             self.camera_manager.stop()
             
-            # Close database
-            self.db.close()
+            # Write remaining events
+            if self._event_writer_thread is not None:
+                try:
+                    self._event_queue.put(None, timeout=5)
+                    self._event_writer_thread.join(timeout=5)
+                except queue.Full:
+                    logger.warning("Event writer is not draining, dropping queued events")
             
             logger.success("Smart CCTV System stopped successfully")
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
+        finally:
+            try:
+                self.db.close()
+            except Exception as e:
+                logger.error(f"Error closing database: {e}")
         
         sys.exit(0)
 
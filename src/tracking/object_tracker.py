@@ -1,15 +1,46 @@
 """Object tracker module - DeepSORT-based implementation."""
+import math
 import time
 import numpy as np
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
 
-from scipy.spatial.distance import euclidean
 from scipy.optimize import linear_sum_assignment
-from filterpy.kalman import KalmanFilter
 from loguru import logger
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def iou_xyxy(x1_1: float, y1_1: float, x2_1: float, y2_1: float,
+             x1_2: float, y1_2: float, x2_2: float, y2_2: float) -> float:
+    """Intersection over Union of two (x1, y1, x2, y2) boxes given as scalars."""
+    # Calculate intersection
+    x1_i = max(x1_1, x1_2)
+    y1_i = max(y1_1, y1_2)
+    x2_i = min(x2_1, x2_2)
+    y2_i = min(y2_1, y2_2)
+    
+    if x2_i <= x1_i or y2_i <= y1_i:
+        return 0.0
+    
+    intersection = (x2_i - x1_i) * (y2_i - y1_i)
+    
+    # Calculate union
+    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
+    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
+    union = area1 + area2 - intersection
+    
+    return intersection / union if union > 0 else 0.0
+
+
+if njit is not None:
+    # Compiled when numba is available; the Python version above is the fallback
+    iou_xyxy = njit(cache=True, nogil=True)(iou_xyxy)
+
 
 @dataclass
 class Track:
@@ -26,16 +57,22 @@ class Track:
     hit_streak: int = 0
     time_since_update: int = 0
     is_confirmed: bool = False
-    trajectory: List[tuple] = field(default_factory=list)
+    # Last 100 (center_point, monotonic time) entries; older ones fall off
+    trajectory: Deque[tuple] = field(default_factory=lambda: deque(maxlen=100))
     velocity: tuple = (0.0, 0.0)
     distance_info: Dict = field(default_factory=dict)
     
-    def update_trajectory(self, center_point: tuple):
-        """Update trajectory with new center point."""
-        self.trajectory.append((center_point, time.time()))
-        # Keep only last 100 points
-        if len(self.trajectory) > 100:
-            self.trajectory = self.trajectory[-100:]
+    def update_trajectory(self, center_point: tuple, timestamp: Optional[float] = None):
+        """
+        Update trajectory with new center point.
+        
+        Args:
+            center_point: Center point of the track
+            timestamp: time.monotonic() value of the observation; now if omitted
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.trajectory.append((center_point, timestamp))
     
     def calculate_velocity(self):
         """Calculate velocity based on recent trajectory points."""
@@ -61,42 +98,119 @@ class Track:
         return np.array([x, y, self.velocity[0], self.velocity[1]])
 
 
-class KalmanBoxTracker:
-    """Kalman filter-based tracker for individual objects."""
+class KalmanStateBank:
+    """
+    Kalman filter state of a group of trackers as arrays, one row each.
     
-    count = 0
+    Constant velocity model over the state (x, y, vx, vy) with the center
+    point as measurement. F, H, Q and R are constant and do not couple the
+    x and y axes, so each axis runs as an independent 2-state filter in
+    closed form, and every row predicts in one vectorized step.
+    """
+    
+    # Noise: measurement R = 10 I, process Q = diag(1, 1, 0.01, 0.01)
+    MEASUREMENT_NOISE = 10.0
+    POSITION_NOISE = 1.0
+    VELOCITY_NOISE = 0.01
+    
+    # Initial covariance P = diag(10, 10, 10000, 10000)
+    INITIAL_POSITION_VARIANCE = 10.0
+    INITIAL_VELOCITY_VARIANCE = 10000.0
+    
+    def __init__(self):
+        """Initialize an empty bank."""
+        # (M, 4) x, y, vx, vy
+        self.state = np.empty((0, 4), dtype=np.float64)
+        # (M, 2, 3) per axis: position variance, position-velocity
+        # covariance, velocity variance
+        self.cov = np.empty((0, 2, 3), dtype=np.float64)
+    
+    def __len__(self) -> int:
+        return len(self.state)
     
-    def __init__(self, detection, class_name: str):
-        """Initialize Kalman tracker with detection."""
-        self.kf = KalmanFilter(dim_x=4, dim_z=2)
+    def add(self, x: float, y: float) -> int:
+        """
+        Add a tracker at rest at (x, y).
         
-        # State transition matrix (constant velocity model)
-        self.kf.F = np.array([
-            [1, 0, 1, 0],
-            [0, 1, 0, 1],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ], dtype=float)
+        Returns:
+            Row index of the new tracker
+        """
+        state = np.array([[x, y, 0.0, 0.0]], dtype=np.float64)
+        cov = np.array([[[self.INITIAL_POSITION_VARIANCE, 0.0, self.INITIAL_VELOCITY_VARIANCE]] * 2],
+                       dtype=np.float64)
+        self.state = np.concatenate([self.state, state])
+        self.cov = np.concatenate([self.cov, cov])
+        return len(self.state) - 1
+    
+    def predict(self, rows=slice(None)):
+        """
+        Predict the next state: x = F x, P = F P F^T + Q.
         
-        # Measurement function
-        self.kf.H = np.array([
-            [1, 0, 0, 0],
-            [0, 1, 0, 0]
-        ], dtype=float)
+        Args:
+            rows: Rows to predict (slice or index array); all by default
+        """
+        state = self.state[rows]
+        cov = self.cov[rows]
+        state[:, :2] += state[:, 2:]
+        cov[..., 0] += 2.0 * cov[..., 1] + cov[..., 2] + self.POSITION_NOISE
+        cov[..., 1] += cov[..., 2]
+        cov[..., 2] += self.VELOCITY_NOISE
+        self.state[rows] = state
+        self.cov[rows] = cov
+    
+    def update(self, rows, measurements: np.ndarray):
+        """
+        Correct rows with measured center points.
         
-        # Measurement noise
-        self.kf.R *= 10.0
+        K = P H^T / (H P H^T + R), x += K (z - H x), P = (I - K H) P
         
-        # Process noise
-        self.kf.Q[2:, 2:] *= 0.01
+        Args:
+            rows: Distinct rows to update (slice or index array)
+            measurements: (K, 2) measured x, y for the rows
+        """
+        state = self.state[rows]
+        cov = self.cov[rows]
+        s = cov[..., 0] + self.MEASUREMENT_NOISE
+        k_pos = cov[..., 0] / s
+        k_vel = cov[..., 1] / s
+        residual = measurements - state[:, :2]
+        state[:, :2] += k_pos * residual
+        state[:, 2:] += k_vel * residual
+        cov[..., 2] -= k_vel * cov[..., 1]
+        cov[..., 1] *= 1.0 - k_pos
+        cov[..., 0] *= 1.0 - k_pos
+        self.state[rows] = state
+        self.cov[rows] = cov
+    
+    def keep(self, mask: np.ndarray):
+        """Drop the rows where mask is False; later rows move up."""
+        self.state = self.state[mask]
+        self.cov = self.cov[mask]
+    
+    def centers(self) -> np.ndarray:
+        """Get every row's center point, truncated like int(), as (M, 2) float64."""
+        return np.trunc(self.state[:, :2])
+
+
+class KalmanBoxTracker:
+    """Kalman filter-based tracker for individual objects."""
+    
+    count = 0
+    
+    def __init__(self, detection, class_name: str, bank: Optional[KalmanStateBank] = None):
+        """
+        Initialize Kalman tracker with detection.
         
+        Args:
+            detection: Detection starting the track
+            class_name: Class of the tracked object
+            bank: State bank to keep the filter state in (shared by one
+                camera's trackers); a private one when omitted
+        """
         # Initial state
         x, y = detection.center_point
-        self.kf.x = np.array([x, y, 0, 0], dtype=float)
-        
-        # Initial covariance
-        self.kf.P[2:, 2:] *= 1000.0
-        self.kf.P *= 10.0
+        self.bank = bank if bank is not None else KalmanStateBank()
+        self.row = self.bank.add(x, y)
         
         # Track properties
         KalmanBoxTracker.count += 1
@@ -113,14 +227,16 @@ class KalmanBoxTracker:
     
     def update(self, detection):
         """Update tracker with new detection."""
+        # Update with measurement
+        self.bank.update(slice(self.row, self.row + 1), np.array([detection.center_point], dtype=np.float64))
+        self.record_update(detection)
+    
+    def record_update(self, detection):
+        """Update track properties for a detection whose measurement is applied."""
         self.time_since_update = 0
         self.hits += 1
         self.hit_streak += 1
         
-        # Update with measurement
-        z = np.array([detection.center_point[0], detection.center_point[1]], dtype=float)
-        self.kf.update(z)
-        
         # Update properties
         self.confidence = detection.confidence
         self.bbox = detection.bbox
@@ -128,20 +244,25 @@ class KalmanBoxTracker:
     
     def predict(self):
         """Predict next state."""
-        self.kf.predict()
+        self.bank.predict(slice(self.row, self.row + 1))
+        self.record_predict()
+        
+        # Get predicted center point
+        predicted_center = self.get_state()
+        return predicted_center
+    
+    def record_predict(self):
+        """Advance track age for a prediction step that is already applied."""
         self.age += 1
         
         if self.time_since_update > 0:
             self.hit_streak = 0
         self.time_since_update += 1
-        
-        # Get predicted center point
-        predicted_center = (int(self.kf.x[0]), int(self.kf.x[1]))
-        return predicted_center
     
     def get_state(self):
         """Get current state as center point."""
-        return (int(self.kf.x[0]), int(self.kf.x[1]))
+        x, y = self.bank.state[self.row, :2].tolist()
+        return (int(x), int(y))
 
 
 class ObjectTracker:
@@ -156,83 +277,128 @@ class ObjectTracker:
         self.min_hits = config.get("processing.tracking.min_hits", 3)
         self.iou_threshold = config.get("processing.tracking.iou_threshold", 0.3)
         
-        # Track storage per camera
+        # Track storage per camera; tracker i keeps its filter state in row i
+        # of the camera's state bank
         self.trackers: Dict[str, List[KalmanBoxTracker]] = defaultdict(list)
+        self.state_banks: Dict[str, KalmanStateBank] = defaultdict(KalmanStateBank)
+        # Track objects per camera by tracker id, kept across frames so their
+        # trajectories accumulate
+        self.tracks: Dict[str, Dict[int, Track]] = defaultdict(dict)
         self.frame_count: Dict[str, int] = defaultdict(int)
         
+        # Pay the numba compile cost here rather than on the first frame
+        if njit is not None:
+            iou_xyxy(0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0)
+        
         logger.info(f"Initializing object tracker with max_age={self.max_age}, min_hits={self.min_hits}")
     
     def _calculate_iou(self, box1, box2):
         """Calculate Intersection over Union (IoU) of two bounding boxes."""
         x1_1, y1_1, x2_1, y2_1 = box1
         x1_2, y1_2, x2_2, y2_2 = box2
-        
-        # Calculate intersection
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i <= x1_i or y2_i <= y1_i:
-            return 0.0
-        
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
-        
-        # Calculate union
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0.0
+        return iou_xyxy(float(x1_1), float(y1_1), float(x2_1), float(y2_1),
+                        float(x1_2), float(y1_2), float(x2_2), float(y2_2))
     
     def _calculate_distance(self, center1, center2):
         """Calculate Euclidean distance between two center points."""
-        return euclidean(center1, center2)
+        return math.hypot(center1[0] - center2[0], center1[1] - center2[1])
     
-    def _associate_detections_to_trackers(self, detections, trackers):
-        """Associate detections to existing trackers using Hungarian algorithm."""
+    def _associate_detections_to_trackers(self, detections, trackers, centers: Optional[np.ndarray] = None,
+                                          det_boxes: Optional[np.ndarray] = None):
+        """
+        Associate detections to existing trackers using Hungarian algorithm.
+        
+        Args:
+            detections: Detections of the frame
+            trackers: Existing trackers
+            centers: (M, 2) predicted tracker centers, if already at hand
+            det_boxes: (N, 4) detection boxes, if already at hand
+        """
         if len(trackers) == 0:
             return np.empty((0, 2), dtype=int), np.arange(len(detections)), np.empty((0, 5), dtype=int)
+        if len(detections) == 0:
+            return np.empty((0, 2), dtype=int), np.empty(0, dtype=int), np.arange(len(trackers))
         
-        # Create cost matrix
-        cost_matrix = np.zeros((len(detections), len(trackers)), dtype=np.float32)
-        
-        for d, detection in enumerate(detections):
-            for t, tracker in enumerate(trackers):
-                # Use IoU as similarity metric
-                predicted_box = self._predict_box_from_center(tracker.get_state(), detection.bbox)
-                iou = self._calculate_iou(detection.bbox, predicted_box)
-                cost_matrix[d, t] = 1.0 - iou  # Convert to cost
+        # Create cost matrix, using IoU as similarity metric
+        if det_boxes is None:
+            det_boxes = self._detection_boxes(detections)
+        if centers is None:
+            centers = np.array([tracker.get_state() for tracker in trackers], dtype=np.float64).reshape(-1, 2)
+        iou = self._iou_matrix(det_boxes, centers)
+        cost_matrix = (1.0 - iou).astype(np.float32)  # Convert to cost
         
         # Solve assignment problem
         if cost_matrix.size > 0:
             det_indices, trk_indices = linear_sum_assignment(cost_matrix)
             
             # Filter out assignments with low IoU
-            matches = []
-            for d, t in zip(det_indices, trk_indices):
-                if cost_matrix[d, t] < (1.0 - self.iou_threshold):
-                    matches.append([d, t])
-            
-            matches = np.array(matches)
+            keep = cost_matrix[det_indices, trk_indices] < (1.0 - self.iou_threshold)
+            matches = np.stack([det_indices[keep], trk_indices[keep]], axis=1)
             
             # Get unmatched detections and trackers
-            unmatched_detections = []
-            for d in range(len(detections)):
-                if d not in matches[:, 0] if len(matches) > 0 else True:
-                    unmatched_detections.append(d)
-            
-            unmatched_trackers = []
-            for t in range(len(trackers)):
-                if t not in matches[:, 1] if len(matches) > 0 else True:
-                    unmatched_trackers.append(t)
+            unmatched_detections = np.setdiff1d(np.arange(len(detections)), matches[:, 0])
+            unmatched_trackers = np.setdiff1d(np.arange(len(trackers)), matches[:, 1])
             
         else:
             matches = np.empty((0, 2), dtype=int)
-            unmatched_detections = list(range(len(detections)))
-            unmatched_trackers = list(range(len(trackers)))
+            unmatched_detections = np.arange(len(detections))
+            unmatched_trackers = np.arange(len(trackers))
+        
+        return matches, unmatched_detections, unmatched_trackers
+    
+    @staticmethod
+    def _detection_boxes(detections) -> np.ndarray:
+        """Get detection bboxes as an (N, 4) float64 array."""
+        bboxes = getattr(detections, "bboxes", None)  # DetectionBatch
+        if bboxes is None:
+            bboxes = [detection.bbox for detection in detections]
+        return np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    
+    @staticmethod
+    def _detection_centers(detections) -> np.ndarray:
+        """Get detection center points as an (N, 2) float64 array."""
+        centers = getattr(detections, "centers", None)  # DetectionBatch
+        if centers is None:
+            centers = [detection.center_point for detection in detections]
+        return np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    
+    @staticmethod
+    def _iou_matrix(det_boxes: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        """
+        Vectorized IoU of every detection against every tracker's predicted box.
+        
+        Each tracker's box is its predicted center with the detection's size,
+        as in _predict_box_from_center, and the IoU follows _calculate_iou.
         
-        return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+        Args:
+            det_boxes: (N, 4) detection boxes x1, y1, x2, y2
+            centers: (M, 2) predicted tracker center points
+            
+        Returns:
+            (N, M) IoU matrix
+        """
+        # Predicted boxes (N, M), truncated toward zero like int()
+        half_w = ((det_boxes[:, 2] - det_boxes[:, 0]) / 2)[:, None]
+        half_h = ((det_boxes[:, 3] - det_boxes[:, 1]) / 2)[:, None]
+        cx = centers[None, :, 0]
+        cy = centers[None, :, 1]
+        px1 = np.trunc(cx - half_w)
+        py1 = np.trunc(cy - half_h)
+        px2 = np.trunc(cx + half_w)
+        py2 = np.trunc(cy + half_h)
+        
+        dx1, dy1, dx2, dy2 = (det_boxes[:, i:i + 1] for i in range(4))
+        
+        # Calculate intersection
+        inter_w = np.minimum(dx2, px2) - np.maximum(dx1, px1)
+        inter_h = np.minimum(dy2, py2) - np.maximum(dy1, py1)
+        overlaps = (inter_w > 0) & (inter_h > 0)
+        intersection = np.where(overlaps, inter_w * inter_h, 0.0)
+        
+        # Calculate union
+        union = (dx2 - dx1) * (dy2 - dy1) + (px2 - px1) * (py2 - py1) - intersection
+        valid = overlaps & (union > 0)
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=valid)
     
     def _predict_box_from_center(self, center, reference_box):
         """Predict bounding box from center point using reference box size."""
@@ -261,64 +427,94 @@ class ObjectTracker:
         """
         self.frame_count[camera_id] += 1
         current_time = time.time()
+        # Trajectory timing uses the monotonic clock so wall-clock jumps
+        # cannot distort velocities
+        now = time.monotonic()
         
         # Get existing trackers for this camera
         trackers = self.trackers[camera_id]
+        bank = self.state_banks[camera_id]
+        
+        # Detection boxes and centers as arrays, built once per frame
+        det_boxes = self._detection_boxes(detections)
+        det_centers = self._detection_centers(detections)
         
-        # Predict next state for all trackers
+        # Predict next state for all trackers in one step
+        bank.predict()
         for tracker in trackers:
-            tracker.predict()
+            tracker.record_predict()
         
         # Associate detections to trackers
         matched, unmatched_dets, unmatched_trks = self._associate_detections_to_trackers(
-            detections, trackers
+            detections, trackers, bank.centers(), det_boxes
         )
         
-        # Update matched trackers
-        for det_idx, trk_idx in matched:
-            trackers[trk_idx].update(detections[det_idx])
+        # Update matched trackers, all measurements at once
+        if len(matched) > 0:
+            det_indices, trk_indices = matched[:, 0], matched[:, 1]
+            bank.update(trk_indices, det_centers[det_indices])
+            for det_idx, trk_idx in zip(det_indices.tolist(), trk_indices.tolist()):
+                trackers[trk_idx].record_update(detections[det_idx])
         
         # Create new trackers for unmatched detections
         for det_idx in unmatched_dets:
             detection = detections[det_idx]
-            new_tracker = KalmanBoxTracker(detection, detection.class_name)
+            new_tracker = KalmanBoxTracker(detection, detection.class_name, bank)
             trackers.append(new_tracker)
         
-        # Remove dead trackers
-        active_trackers = []
-        for tracker in trackers:
-            if tracker.time_since_update <= self.max_age:
-                active_trackers.append(tracker)
+        # Remove dead trackers, keeping rows aligned with the tracker list
+        alive = np.array([tracker.time_since_update <= self.max_age for tracker in trackers], dtype=bool)
+        active_trackers = [tracker for tracker, keep in zip(trackers, alive.tolist()) if keep]
+        tracks_by_id = self.tracks[camera_id]
+        if len(active_trackers) < len(trackers):
+            bank.keep(alive)
+            for row, tracker in enumerate(active_trackers):
+                tracker.row = row
+            for tracker, keep in zip(trackers, alive.tolist()):
+                if not keep:
+                    tracks_by_id.pop(tracker.id, None)
         
         self.trackers[camera_id] = active_trackers
         
-        # Convert to Track objects
+        # Convert to Track objects, reading every center from the bank at once
+        centers = bank.state[:, :2].astype(np.int64).tolist()
         tracks = []
         for tracker in active_trackers:
             # Only return confirmed tracks
             if tracker.hits >= self.min_hits or tracker.hit_streak >= 1:
-                track = Track(
-                    track_id=tracker.id,
-                    class_name=tracker.class_name,
-                    confidence=tracker.confidence,
-                    bbox=tracker.bbox,
-                    center_point=tracker.get_state(),
-                    area=tracker.area,
-                    first_seen=current_time - (tracker.age * 0.1),  # Approximate
-                    last_seen=current_time,
-                    hits=tracker.hits,
-                    hit_streak=tracker.hit_streak,
-                    time_since_update=tracker.time_since_update,
-                    is_confirmed=tracker.hits >= self.min_hits
-                )
+                center_point = tuple(centers[tracker.row])
+                track = tracks_by_id.get(tracker.id)
+                if track is None:
+                    track = Track(
+                        track_id=tracker.id,
+                        class_name=tracker.class_name,
+                        confidence=tracker.confidence,
+                        bbox=tracker.bbox,
+                        center_point=center_point,
+                        area=tracker.area,
+                        first_seen=current_time - (tracker.age * 0.1),  # Approximate
+                        last_seen=current_time
+                    )
+                    tracks_by_id[tracker.id] = track
+                
+                # Refresh the fields that change between frames
+                track.confidence = tracker.confidence
+                track.bbox = tracker.bbox
+                track.center_point = center_point
+                track.area = tracker.area
+                track.last_seen = current_time
+                track.hits = tracker.hits
+                track.hit_streak = tracker.hit_streak
+                track.time_since_update = tracker.time_since_update
+                track.is_confirmed = tracker.hits >= self.min_hits
                 
                 # Update trajectory
-                track.update_trajectory(track.center_point)
+                track.update_trajectory(track.center_point, now)
                 track.calculate_velocity()
                 
                 tracks.append(track)
         
-        logger.debug(f"Tracking update for {camera_id}: {len(detections)} detections -> {len(tracks)} tracks")
+        logger.debug("Tracking update for {}: {} detections -> {} tracks", camera_id, len(detections), len(tracks))
         
         return tracks
     
@@ -327,6 +523,7 @@ class ObjectTracker:
         trackers = self.trackers[camera_id]
         for tracker in trackers:
             if tracker.id == track_id:
+                current_time = time.time()
                 track = Track(
                     track_id=tracker.id,
                     class_name=tracker.class_name,
@@ -334,8 +531,8 @@ class ObjectTracker:
                     bbox=tracker.bbox,
                     center_point=tracker.get_state(),
                     area=tracker.area,
-                    first_seen=time.time() - (tracker.age * 0.1),
-                    last_seen=time.time(),
+                    first_seen=current_time - (tracker.age * 0.1),
+                    last_seen=current_time,
                     hits=tracker.hits,
                     hit_streak=tracker.hit_streak,
                     time_since_update=tracker.time_since_update,
@@ -352,4 +549,6 @@ class ObjectTracker:
         """Stop tracker and cleanup resources."""
         logger.info("Stopping object tracker")
         self.trackers.clear()
+        self.state_banks.clear()
+        self.tracks.clear()
         self.frame_count.clear()
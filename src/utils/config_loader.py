@@ -1,12 +1,32 @@
 """
 Configuration loader utility.
 """
+import copy
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 from loguru import logger
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime: float) -> Any:
+    """
+    Parse a YAML file once per (path, mtime).
+    
+    Callers must copy the result before mutating it; the cached object is
+    shared across every ConfigLoader for the same unchanged file.
+    """
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
 
 class ConfigLoader:
     """Configuration manager for the Smart CCTV System."""
@@ -28,8 +48,9 @@ class ConfigLoader:
             if not self.config_path.exists():
                 raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
             
-            with open(self.config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+            # Re-parse only when the file has changed on disk
+            path = str(self.config_path.resolve())
+            self.config = copy.deepcopy(_load_cached(path, os.path.getmtime(path)))
             
             # Replace environment variable placeholders
             self._resolve_env_vars(self.config)
@@ -40,6 +61,15 @@ class ConfigLoader:
             logger.error(f"Failed to load configuration: {e}")
             raise
     
+    def load_config(self) -> Dict[str, Any]:
+        """
+        Get the loaded configuration dictionary.
+        
+        Returns:
+            Configuration dictionary
+        """
+        return self.config
+    
     def _resolve_env_vars(self, obj):
         """Recursively resolve environment variable placeholders."""
         if isinstance(obj, dict):
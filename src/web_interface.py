@@ -4,7 +4,7 @@ Main Flask application for configuration management and monitoring dashboard.
 """
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import yaml
 import json
@@ -17,19 +17,55 @@ import threading
 import time
 import logging
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'smart-cctv-system-secret-key-change-in-production'
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+
+class _OrjsonCodec:
+    """Drop-in for the json module, used by Socket.IO to (de)serialize packets."""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        # orjson output is already compact, matching separators=(',', ':')
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+socketio_options = {'cors_allowed_origins': "*"}
+if orjson:
+    socketio_options['json'] = _OrjsonCodec
+socketio = SocketIO(app, **socketio_options)
 
 # Configuration paths
 CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "events.db"
 
+# Socket.IO room for clients showing live system stats
+STATS_ROOM = "dashboard"
+
+# Latest value of every stat sent to STATS_ROOM. Ticks only carry changed
+# keys, so clients joining the room get this full snapshot first
+latest_stats = {}
+
 class ConfigManager:
     """Handle configuration file operations."""
     
@@ -43,13 +79,13 @@ class ConfigManager:
         try:
             if self.config_path.exists():
                 with open(self.config_path, 'r') as f:
-                    self._config = yaml.safe_load(f)
+                    self._config = yaml.load(f, Loader=_YamlLoader)
             else:
                 # Use example config if main config doesn't exist
                 example_path = self.config_path.parent / "config.example.yaml"
                 if example_path.exists():
                     with open(example_path, 'r') as f:
-                        self._config = yaml.safe_load(f)
+                        self._config = yaml.load(f, Loader=_YamlLoader)
                 else:
                     self._config = self._get_default_config()
             
@@ -115,12 +151,22 @@ class DatabaseManager:
         self.db_path = db_path
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with per-connection pragmas applied."""
+        conn = sqlite3.connect(self.db_path)
+        # Safe with WAL and avoids an fsync on every commit
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+    
     def init_database(self):
         """Initialize database tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
+                # WAL lets readers run alongside writes; persists in the db file
+                cursor.execute('PRAGMA journal_mode=WAL')
+                
                 # Create alerts table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS alerts (
@@ -158,36 +204,51 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
     
+    _INSERT_ALERT_SQL = '''
+        INSERT INTO alerts (camera_id, camera_name, alert_type, object_class, 
+                          confidence, distance, priority, message, snapshot_path)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _alert_row(alert_data: Dict[str, Any]) -> tuple:
+        """Build the INSERT parameters for an alert."""
+        return (
+            alert_data.get('camera_id'),
+            alert_data.get('camera_name'),
+            alert_data.get('alert_type'),
+            alert_data.get('object_class'),
+            alert_data.get('confidence'),
+            alert_data.get('distance'),
+            alert_data.get('priority', 'medium'),
+            alert_data.get('message'),
+            alert_data.get('snapshot_path')
+        )
+    
     def add_alert(self, alert_data: Dict[str, Any]) -> bool:
         """Add new alert to database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO alerts (camera_id, camera_name, alert_type, object_class, 
-                                      confidence, distance, priority, message, snapshot_path)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    alert_data.get('camera_id'),
-                    alert_data.get('camera_name'),
-                    alert_data.get('alert_type'),
-                    alert_data.get('object_class'),
-                    alert_data.get('confidence'),
-                    alert_data.get('distance'),
-                    alert_data.get('priority', 'medium'),
-                    alert_data.get('message'),
-                    alert_data.get('snapshot_path')
-                ))
-                conn.commit()
+            with self._connect() as conn:
+                conn.execute(self._INSERT_ALERT_SQL, self._alert_row(alert_data))
                 return True
         except Exception as e:
             logger.error(f"Failed to add alert: {e}")
             return False
     
+    def add_alerts_bulk(self, alerts: List[Dict[str, Any]]) -> bool:
+        """Add several alerts in a single transaction."""
+        try:
+            with self._connect() as conn:
+                conn.executemany(self._INSERT_ALERT_SQL, [self._alert_row(a) for a in alerts])
+                return True
+        except Exception as e:
+            logger.error(f"Failed to add alerts: {e}")
+            return False
+    
     def get_recent_alerts(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent alerts from database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute('''
@@ -204,7 +265,7 @@ class DatabaseManager:
     def get_alerts_by_date_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get alerts within date range."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute('''
@@ -219,9 +280,14 @@ class DatabaseManager:
             return []
 
 # Initialize managers
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 config_manager = ConfigManager(CONFIG_PATH)
 db_manager = DatabaseManager(DB_PATH)
 
+def init_database():
+    """Create database tables if needed (used by the launcher scripts)."""
+    db_manager.init_database()
+
 def login_required(f):
     """Decorator for routes requiring authentication."""
     @wraps(f)
@@ -416,6 +482,22 @@ def handle_disconnect():
     """Handle client disconnection."""
     logger.info('Client disconnected')
 
+@socketio.on('join')
+def handle_join(data):
+    """Subscribe client to a room (e.g. 'dashboard' or 'cam_<camera_id>')."""
+    room = (data or {}).get('room')
+    if room:
+        join_room(room)
+        if room == STATS_ROOM and latest_stats:
+            emit('tick', {'stats': dict(latest_stats), 'alerts': []})
+
+@socketio.on('leave')
+def handle_leave(data):
+    """Unsubscribe client from a room."""
+    room = (data or {}).get('room')
+    if room:
+        leave_room(room)
+
 def run_web_interface():
     """Run the web interface."""
     config = config_manager.get_config()